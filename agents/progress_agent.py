@@ -2,15 +2,69 @@ from crewai import Agent
 from services.sheets_service import GoogleSheetsService
 from services.email_service import EmailService
 from services.slack_service import SlackService
+from services.reminder_fanout import ReminderFanout
+from services.deadline_index import DeadlineIndex
+from services.gemini_service import GeminiService
+from services.reply_ingestion import ReplyIngestion, apply_progress, latest_progress
+from services.tenant_service import TenantContext
+from services.state_backend import StateBackend, create_state_backend
+from services.time_context import current_time
 from models.schemas import TeamMember, ProgressReport
-from datetime import datetime
-from typing import List
+import asyncio
+import os
+from typing import List, Optional
 
 class ProgressAgent:
-    def __init__(self):
-        self.sheets_service = GoogleSheetsService()
-        self.email_service = EmailService()
-        self.slack_service = SlackService()
+    def __init__(self, sheets_service: Optional[GoogleSheetsService] = None,
+                 email_service: Optional[EmailService] = None,
+                 slack_service: Optional[SlackService] = None,
+                 gemini_service: Optional[GeminiService] = None,
+                 state: Optional[StateBackend] = None):
+        # Pass the process-wide services in to share their clients; any left out is built on first use,
+        # so constructing the agent opens no connections and creates no mail directories
+        self._sheets_service = sheets_service
+        self._email_service = email_service
+        self._slack_service = slack_service
+        self._gemini_service = gemini_service
+        self._state = state
+        self._fanout: Optional[ReminderFanout] = None
+        self._ingestion: Optional[ReplyIngestion] = None
+
+    @property
+    def sheets_service(self) -> GoogleSheetsService:
+        if self._sheets_service is None:
+            self._sheets_service = GoogleSheetsService()
+        return self._sheets_service
+
+    @property
+    def email_service(self) -> EmailService:
+        if self._email_service is None:
+            self._email_service = EmailService()
+        return self._email_service
+
+    @property
+    def slack_service(self) -> SlackService:
+        if self._slack_service is None:
+            self._slack_service = SlackService()
+        return self._slack_service
+
+    @property
+    def fanout(self) -> ReminderFanout:
+        if self._fanout is None:
+            self._fanout = ReminderFanout(self.slack_service, self.email_service)
+        return self._fanout
+
+    @property
+    def ingestion(self) -> ReplyIngestion:
+        if self._ingestion is None:
+            # The LLM is only a fallback for replies the regex cannot read
+            gemini_service = self._gemini_service
+            if gemini_service is None and os.getenv('GEMINI_API_KEY'):
+                gemini_service = GeminiService()
+            # Thread high-water marks live in the shared state so a restart doesn't re-apply old replies
+            state = self._state or create_state_backend()
+            self._ingestion = ReplyIngestion.from_env(self.slack_service, gemini_service, state)
+        return self._ingestion
     
     def create_agent(self) -> Agent:
         """Create the progress checking agent"""
@@ -29,52 +83,78 @@ class ProgressAgent:
             ]
         )
     
-    async def check_team_progress(self, team_members: List[TeamMember]) -> List[TeamMember]:
+    async def check_team_progress(self, team_members: List[TeamMember], digest: Optional[bool] = None,
+                                  tenant: Optional[TenantContext] = None) -> List[TeamMember]:
         """Check the progress of all team members"""
-        updated_members = []
-        for member in team_members:
-            # Check if any tasks are approaching deadline
-            approaching_deadlines = [
-                task for task, deadline in zip(member.tasks, member.deadlines)
-                if (deadline - datetime.now()).days <= 2
-            ]
-            
-            if approaching_deadlines:
-                # Send reminder for approaching deadlines
-                await self.slack_service.send_reminder(member.name, approaching_deadlines)
-            
-            # Send progress check email
-            await self.email_service.send_progress_check(member)
-            updated_members.append(member)
+        plan = self.fanout.plan(team_members, deadline_index=self._deadline_index(tenant))
         
-        return updated_members
+        # Remind about approaching deadlines and send progress check emails side by side
+        await asyncio.gather(
+            self.fanout.send_reminders(
+                [(member.name, tasks) for member, tasks in plan.deadline_reminders],
+                digest=digest,
+                title="Approaching deadlines"
+            ),
+            self.fanout.send_progress_checks(team_members)
+        )
+        
+        return list(team_members)
     
-    async def send_progress_reminders(self, team_members: List[TeamMember]):
+    async def send_progress_reminders(self, team_members: List[TeamMember], digest: Optional[bool] = None,
+                                      tenant: Optional[TenantContext] = None):
         """Send reminders to team members who haven't updated their progress"""
-        for member in team_members:
-            if member.progress == 0.0:  # Assuming 0.0 means no progress update
-                await self.slack_service.send_reminder(
-                    member.name,
-                    member.tasks
-                )
+        plan = self.fanout.plan(team_members, deadline_index=self._deadline_index(tenant))
+        # Members at 0.0 progress are assumed not to have sent an update
+        await self.fanout.send_reminders(
+            [(member.name, member.tasks) for member in plan.idle_members],
+            digest=digest,
+            title="Progress updates needed"
+        )
     
-    async def update_progress_data(self, team_members: List[TeamMember]) -> List[TeamMember]:
+    async def update_progress_data(self, team_members: List[TeamMember],
+                                   tenant: Optional[TenantContext] = None) -> List[TeamMember]:
         """Update progress data based on team member responses"""
-        # In a real implementation, this would parse email responses
-        # and update the progress data accordingly
+        sheets_service = tenant.sheets_service if tenant else self.sheets_service
+        if not sheets_service.write_enabled:
+            # The sheet is the only durable store: an acknowledged reply would be lost at the next fetch,
+            # so replies stay unread until SHEETS_WRITE_ENABLED is on
+            return team_members
+        
+        collected = await self.ingestion.collect()
+        replies = [reply for _, source_replies in collected for reply in source_replies]
+        if not replies:
+            return team_members
+        
+        parsed = await self.ingestion.read(replies, tenant.llm_slot if tenant else None)
+        _, changed = apply_progress(team_members, latest_progress(parsed))
+        written = await sheets_service.update_progress(changed)
+        # Only what reached the sheet goes into the roster; skipped rows keep their old progress
+        team_members, _ = apply_progress(team_members, {email.lower(): progress for email, progress in written.items()})
+        if tenant and written:
+            tenant.update_roster(team_members, written)
+        
+        # Acknowledge a reply once nothing it says is left unstored: it stated no progress, its sender's
+        # update was written, or the sheet already had that value. The rest are read again next cycle.
+        unwritten = {email.lower() for email in changed if email not in written}
+        stored = {id(reply) for reply, progress in parsed if progress is None or reply.sender not in unwritten}
+        await asyncio.gather(*[
+            asyncio.to_thread(source.ack, [reply for reply in source_replies if id(reply) in stored])
+            for source, source_replies in collected
+        ])
         return team_members
     
-    async def generate_progress_summary(self, team_members: List[TeamMember]) -> ProgressReport:
+    async def generate_progress_summary(self, team_members: List[TeamMember],
+                                        tenant: Optional[TenantContext] = None) -> ProgressReport:
         """Generate a summary of team progress"""
         overall_progress = sum(member.progress for member in team_members) / len(team_members)
         
         # Identify blockers
         blockers = []
-        for member in team_members:
-            if member.progress < 30 and any(
-                (deadline - datetime.now()).days <= 2
-                for deadline in member.deadlines
-            ):
+        deadline_index = DeadlineIndex.for_roster(team_members, self._deadline_index(tenant))
+        clock = current_time()
+        due_soon = deadline_index.members_due_within(2, clock.now)
+        for position, member in enumerate(team_members):
+            if member.progress < 30 and position in due_soon:
                 blockers.append(f"{member.name} is behind on tasks with approaching deadlines")
         
         # Generate recommendations
@@ -85,10 +165,15 @@ class ProgressAgent:
             recommendations.append("Schedule one-on-one meetings with team members who are behind")
         
         return ProgressReport(
-            date=datetime.now(),
+            date=clock.now,
             team_members=team_members,
             overall_progress=overall_progress,
             summary=f"Team is {overall_progress}% complete with their tasks",
             blockers=blockers,
             recommendations=recommendations
-        ) 
\ No newline at end of file
+        ) 
+
+    @staticmethod
+    def _deadline_index(tenant: Optional[TenantContext]) -> Optional[DeadlineIndex]:
+        """The tenant's maintained index; callers rebuild only if it no longer lines up with their roster"""
+        return tenant.deadline_index if tenant else None
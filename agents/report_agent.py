@@ -2,15 +2,37 @@ from crewai import Agent
 from services.sheets_service import GoogleSheetsService
 from services.email_service import EmailService
 from services.slack_service import SlackService
+from services.role_aggregates import RoleAggregates
+from services.time_context import current_time
 from models.schemas import TeamMember, ProgressReport
-from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 class ReportAgent:
-    def __init__(self):
-        self.sheets_service = GoogleSheetsService()
-        self.email_service = EmailService()
-        self.slack_service = SlackService()
+    def __init__(self, sheets_service: Optional[GoogleSheetsService] = None,
+                 email_service: Optional[EmailService] = None,
+                 slack_service: Optional[SlackService] = None):
+        # Pass the process-wide services in to share their clients; any left out is built on first use
+        self._sheets_service = sheets_service
+        self._email_service = email_service
+        self._slack_service = slack_service
+
+    @property
+    def sheets_service(self) -> GoogleSheetsService:
+        if self._sheets_service is None:
+            self._sheets_service = GoogleSheetsService()
+        return self._sheets_service
+
+    @property
+    def email_service(self) -> EmailService:
+        if self._email_service is None:
+            self._email_service = EmailService()
+        return self._email_service
+
+    @property
+    def slack_service(self) -> SlackService:
+        if self._slack_service is None:
+            self._slack_service = SlackService()
+        return self._slack_service
     
     def create_agent(self) -> Agent:
         """Create the report generation agent"""
@@ -29,7 +51,8 @@ class ReportAgent:
             ]
         )
     
-    async def analyze_team_progress(self, team_members: List[TeamMember]) -> dict:
+    async def analyze_team_progress(self, team_members: List[TeamMember],
+                                    aggregates: Optional[RoleAggregates] = None) -> dict:
         """Analyze team progress and identify key metrics"""
         analysis = {
             "overall_progress": 0.0,
@@ -38,29 +61,19 @@ class ReportAgent:
             "recommendations": []
         }
         
-        # Calculate overall progress
-        total_progress = sum(member.progress for member in team_members)
-        analysis["overall_progress"] = total_progress / len(team_members)
+        # Running per-role sums (kept up to date by the tenant); otherwise built from this roster
+        if aggregates is None:
+            aggregates = RoleAggregates(team_members)
         
-        # Calculate progress by role
-        role_progress = {}
-        for member in team_members:
-            if member.role not in role_progress:
-                role_progress[member.role] = []
-            role_progress[member.role].append(member.progress)
-        
-        for role, progress_list in role_progress.items():
-            analysis["role_progress"][role] = sum(progress_list) / len(progress_list)
+        # Calculate overall and per-role progress in O(roles)
+        analysis["overall_progress"] = aggregates.overall_progress
+        analysis["role_progress"] = aggregates.role_progress()
         
         # Identify blockers
-        for member in team_members:
-            if member.progress < 30 and any(
-                (deadline - datetime.now()).days <= 2
-                for deadline in member.deadlines
-            ):
-                analysis["blockers"].append(
-                    f"{member.name} ({member.role}) is behind on tasks with approaching deadlines"
-                )
+        for member in aggregates.blockers(current_time().now):
+            analysis["blockers"].append(
+                f"{member.name} ({member.role}) is behind on tasks with approaching deadlines"
+            )
         
         # Generate recommendations
         if analysis["overall_progress"] < 50:
@@ -78,8 +91,9 @@ class ReportAgent:
     
     async def generate_report(self, analysis: dict, team_members: List[TeamMember]) -> ProgressReport:
         """Generate a comprehensive progress report"""
+        clock = current_time()
         # Create a detailed summary
-        summary = f"""Team Progress Report for {datetime.now().strftime('%Y-%m-%d')}
+        summary = f"""Team Progress Report for {clock.today}
 
 Overall Progress: {analysis['overall_progress']:.1f}%
 
@@ -94,7 +108,7 @@ Next Steps:
 """
         
         return ProgressReport(
-            date=datetime.now(),
+            date=clock.now,
             team_members=team_members,
             overall_progress=analysis["overall_progress"],
             summary=summary,
@@ -3,31 +3,54 @@ from services.sheets_service import GoogleSheetsService
 from models.schemas import TeamMember
 from datetime import datetime
 from services.gemini_service import GeminiService
-from typing import List, Dict, Tuple, Any
+from services.tenant_service import TenantContext
+from services.prompt_builder import PromptBuilder
+from langchain_core.messages import BaseMessage
+from services.metrics import timed
+from services.time_context import pinned_time
+from typing import List, Dict, Tuple, Any, Optional
+import asyncio
 
 class SpreadsheetAgent:
     def __init__(self):
         self.sheets_service = GoogleSheetsService()
         self.gemini_service = GeminiService()
+        self.prompt_builder = PromptBuilder()
     
     # ... existing methods ...
 
-    async def get_formatted_emails(self, team_members: List[TeamMember]) -> List[Tuple[str, str]]:
-        email_contents = []
+    @pinned_time
+    async def get_formatted_emails(self, team_members: List[TeamMember], tenant: Optional[TenantContext] = None) -> List[Tuple[str, str]]:
+        """Generate emails for all members concurrently, within the tenant's LLM budget"""
+        valid_members = []
         for member in team_members:
-            try:
-                # Ensure member is a TeamMember object with required attributes
-                if not all(hasattr(member, attr) for attr in ['name', 'email', 'role', 'progress']):
-                    print(f"Skipping invalid member: {member}")
-                    continue
-                    
-                email_content = self.generate_personalized_email(member)
-                email_contents.append((member.email, email_content))
-            except Exception as e:
-                print(f"Error processing member {getattr(member, 'email', 'unknown')}: {str(e)}")
+            # Ensure member is a TeamMember object with required attributes
+            if not all(hasattr(member, attr) for attr in ['name', 'email', 'role', 'progress']):
+                print(f"Skipping invalid member: {member}")
+                continue
+            valid_members.append(member)
         
-        return email_contents
+        results = await asyncio.gather(*[
+            self._generate_for_member(member, tenant) for member in valid_members
+        ])
+        return [result for result in results if result is not None]
 
+    async def _generate_for_member(self, member: TeamMember, tenant: Optional[TenantContext]) -> Optional[Tuple[str, str]]:
+        try:
+            email_content = await self.agenerate_personalized_email(member, tenant)
+            return (member.email, email_content)
+        except Exception as e:
+            print(f"Error processing member {getattr(member, 'email', 'unknown')}: {str(e)}")
+            return None
+
+    async def agenerate_personalized_email(self, member: TeamMember, tenant: Optional[TenantContext] = None) -> str:
+        """Generate a personalized email for a team member without blocking the event loop"""
+        try:
+            with timed("prompt_build"):
+                prompt = self._create_prompt(member)
+            return await self.gemini_service.ainvoke(prompt, tenant.llm_slot if tenant else None)
+        except Exception as e:
+            print(f"Error generating personalized email: {str(e)}")
 
     def generate_personalized_email(self, member: TeamMember) -> str:
         """Generate a personalized email for a team member"""
@@ -36,40 +59,21 @@ class SpreadsheetAgent:
                 print("WARNING: Gemini service not properly initialized")
                 
                 
-            prompt = self._create_prompt(member)
-            response = self.gemini_service.llm.invoke(prompt)
+            with timed("prompt_build"):
+                prompt = self._create_prompt(member)
+            with timed("gemini_call"):
+                response = self.gemini_service.llm.invoke(prompt)
             return response.content
         except Exception as e:
             print(f"Error generating personalized email: {str(e)}")
             
 
-    def _create_prompt(self, member: TeamMember) -> str:
-        """Create a detailed prompt for Gemini based on member data."""
-        # Calculate days until deadline
-        days_until = "Unknown"
-        try:
-            if member.deadlines and len(member.deadlines) > 0:
-                deadline_date = member.deadlines[0]  # Get the first deadline
-                days_until = max(0, (deadline_date - datetime.now()).days)
-        except:
-            days_until = "Unknown"
-
-        # Create the prompt
-        return f"""As a project manager, write a personalized email to {member.name} regarding their work progress.
-        
-Current Status:
-- Role: {member.role}
-- Tasks: {', '.join(member.tasks)}
-- Deadline: {', '.join(d.strftime('%Y-%m-%d') for d in member.deadlines)} ({days_until} days remaining)
-- Current Progress: {member.progress}%
-
-Please write a professional but friendly email that:
-1. Acknowledges their current progress
-2. Shows understanding of their role and tasks
-3. Asks for specific updates on their progress
-4. Offers support if needed
-5. Maintains a motivating tone
-6. References their deadline and progress appropriately
-
-The email should be personalized based on their role, progress, and time until deadline.
-"""
\ No newline at end of file
+    def _create_prompt(self, member: TeamMember) -> List[BaseMessage]:
+        """Create a compact prompt for Gemini based on member data."""
+        return self.prompt_builder.build_messages(
+            name=member.name,
+            role=member.role,
+            tasks=member.tasks,
+            deadlines=member.deadlines,
+            progress=member.progress
+        )
@@ -0,0 +1,299 @@
+"""
+Deterministic local stand-ins for Google Sheets, Gemini, Slack and SMTP
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+class FakeBehavior:
+    """Latency, error rate and rate limit shared by the fakes, seeded for repeatable runs"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: Optional[float] = None, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # Calls per second, None for unlimited
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit or 0.0
+        self._last_refill = time.monotonic()
+
+    def _admit(self) -> str:
+        """Decide the outcome of one call: ok, error or rate_limited"""
+        with self._lock:
+            self.calls += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._last_refill) * self.rate_limit)
+                self._last_refill = now
+                if self._tokens < 1:
+                    self.rate_limited += 1
+                    return "rate_limited"
+                self._tokens -= 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return "error"
+            return "ok"
+
+    def _delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def call(self) -> str:
+        """Simulate a blocking call"""
+        outcome = self._admit()
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return outcome
+
+    async def acall(self) -> str:
+        """Simulate a non-blocking call"""
+        outcome = self._admit()
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return outcome
+
+class FakeHttpError(Exception):
+    """Mimics googleapiclient's HttpError closely enough for status checks"""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"<HttpError {status} \"{reason}\">")
+        self.resp = type("Response", (), {"status": status})()
+
+class _FakeValuesRequest:
+    def __init__(self, api: "FakeSheetsApi", spreadsheet_id: str):
+        self.api = api
+        self.spreadsheet_id = spreadsheet_id
+        self.headers: Dict[str, str] = {}
+
+    def execute(self) -> Dict[str, Any]:
+        outcome = self.api.behavior.call()
+        if outcome == "rate_limited":
+            raise FakeHttpError(429, "RESOURCE_EXHAUSTED")
+        if outcome == "error":
+            raise FakeHttpError(503, "Service Unavailable")
+        return {"values": self.api.sheets.get(self.spreadsheet_id, [])}
+
+class FakeSheetsApi:
+    """Stand-in for the googleapiclient Sheets resource: spreadsheets().values().get().execute()"""
+
+    def __init__(self, behavior: Optional[FakeBehavior] = None):
+        self.behavior = behavior or FakeBehavior()
+        self.sheets: Dict[str, List[List[str]]] = {}
+        self.batch_updates = 0
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId: str, range: str) -> _FakeValuesRequest:
+        return _FakeValuesRequest(self, spreadsheetId)
+
+    def batchUpdate(self, spreadsheetId: str, body: Dict[str, Any]) -> "_FakeBatchUpdateRequest":
+        return _FakeBatchUpdateRequest(self, spreadsheetId, body)
+
+class _FakeBatchUpdateRequest(_FakeValuesRequest):
+    """Applies A1 single-cell writes like 'Team!F7' to the stored rows"""
+
+    def __init__(self, api: "FakeSheetsApi", spreadsheet_id: str, body: Dict[str, Any]):
+        super().__init__(api, spreadsheet_id)
+        self.body = body
+
+    def execute(self) -> Dict[str, Any]:
+        super().execute()
+        self.api.batch_updates += 1
+        rows = self.api.sheets.setdefault(self.spreadsheet_id, [])
+        for update in self.body.get("data", []):
+            cell = update["range"].split("!")[-1]
+            column, row = ord(cell[0]) - ord("A"), int(cell[1:]) - 2  # Rows start at Team!A2
+            rows[row][column] = str(update["values"][0][0])
+        return {"totalUpdatedCells": len(self.body.get("data", []))}
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+class FakeLLM:
+    """Stand-in for ChatGoogleGenerativeAI with invoke/ainvoke"""
+
+    def __init__(self, behavior: Optional[FakeBehavior] = None, seconds_per_kchar: float = 0.0):
+        self.behavior = behavior or FakeBehavior()
+        self.seconds_per_kchar = seconds_per_kchar  # Extra latency that scales with prompt size
+        self.prompt_chars = 0
+
+    def _respond(self, prompt: Any, outcome: str) -> FakeMessage:
+        if outcome == "rate_limited":
+            raise Exception("429 RESOURCE_EXHAUSTED: Quota exceeded")
+        if outcome == "error":
+            raise Exception("500 Internal error")
+        return FakeMessage(f"Hello,\n\nThanks for your update.\n\n({len(str(prompt))} prompt chars)")
+
+    def invoke(self, prompt: Any) -> FakeMessage:
+        self.prompt_chars += len(str(prompt))
+        outcome = self.behavior.call()
+        if self.seconds_per_kchar:
+            time.sleep(len(str(prompt)) / 1000 * self.seconds_per_kchar)
+        return self._respond(prompt, outcome)
+
+    async def ainvoke(self, prompt: Any) -> FakeMessage:
+        self.prompt_chars += len(str(prompt))
+        outcome = await self.behavior.acall()
+        if self.seconds_per_kchar:
+            await asyncio.sleep(len(str(prompt)) / 1000 * self.seconds_per_kchar)
+        return self._respond(prompt, outcome)
+
+class FakeSlackClient:
+    """Stand-in for slack_sdk's WebClient recording every posted message"""
+
+    def __init__(self, behavior: Optional[FakeBehavior] = None):
+        self.behavior = behavior or FakeBehavior()
+        self.messages: List[Dict[str, Any]] = []
+        self.user_emails: Dict[str, str] = {}  # Slack user id -> email, for users_info
+
+    def _response(self, data: Dict[str, Any], status_code: int = 200) -> SlackResponse:
+        return SlackResponse(
+            client=self, http_verb="POST", api_url="https://slack.com/api/fake",
+            req_args={}, data=data, headers={}, status_code=status_code
+        )
+
+    def chat_postMessage(self, **kwargs) -> SlackResponse:
+        outcome = self.behavior.call()
+        if outcome == "rate_limited":
+            raise SlackApiError("ratelimited", self._response({"ok": False, "error": "ratelimited"}, 429))
+        if outcome == "error":
+            raise SlackApiError("internal_error", self._response({"ok": False, "error": "internal_error"}, 500))
+        ts = f"{time.time():.6f}"
+        self.messages.append({**kwargs, "ts": ts})
+        return self._response({"ok": True, "channel": kwargs.get("channel"), "ts": ts})
+
+    def api_call(self, api_method: str, data: Optional[Dict[str, Any]] = None, **kwargs) -> SlackResponse:
+        """Form-encoded calls; blocks stay the JSON string the caller posted, as Slack receives them"""
+        if api_method == "chat.postMessage":
+            return self.chat_postMessage(**(data or {}))
+        raise SlackApiError(f"unsupported method {api_method}", self._response({"ok": False, "error": "unknown_method"}, 404))
+
+    def conversations_replies(self, channel: str, ts: str, oldest: Optional[str] = None, **kwargs) -> SlackResponse:
+        replies = [m for m in self.messages if m.get("channel") == channel and m.get("thread_ts") == ts]
+        parent = {"ts": ts, "bot_id": "B0", "text": "parent"}
+        return self._response({"ok": True, "messages": [parent] + [
+            {"ts": m["ts"], "user": m.get("user"), "text": m.get("text", ""), **({"bot_id": "B0"} if not m.get("user") else {})}
+            for m in replies if float(m["ts"]) > float(oldest or 0)
+        ]})
+
+    def users_info(self, user: str) -> SlackResponse:
+        return self._response({"ok": True, "user": {"id": user, "profile": {"email": self.user_emails.get(user)}}})
+
+    def auth_test(self) -> SlackResponse:
+        return self._response({"ok": True, "team": "bench", "user": "bot", "bot_id": "B0"})
+
+class LocalSMTPServer:
+    """aiosmtpd server on localhost counting delivered messages"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8025, latency: float = 0.0):
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise ImportError("The aiosmtpd package is required for the SMTP benchmarks")
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.messages = 0
+        self._controller = Controller(self, hostname=host, port=port)
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.messages += 1
+        return "250 Message accepted for delivery"
+
+    def __enter__(self) -> "LocalSMTPServer":
+        self._controller.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._controller.stop()
+
+class LocalSocketModeServer:
+    """WebSocket stand-in for Slack's Socket Mode endpoint: pushes envelopes and records when each is acked"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        try:
+            from aiohttp import web
+        except ImportError:
+            raise ImportError("The aiohttp package is required for the Socket Mode benchmarks")
+        self.host = host
+        self.port = port
+        self.acks: Dict[str, float] = {}  # envelope_id -> time the ack arrived
+        self.connections = 0
+        self._sockets: List[Any] = []
+        self._connected = asyncio.Event()
+        self._app = web.Application()
+        self._app.router.add_get("/", self._websocket)
+        self._runner = web.AppRunner(self._app)
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/"
+
+    async def start(self):
+        from aiohttp import web
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for ws in list(self._sockets):
+            await ws.close()
+        await self._runner.cleanup()
+
+    async def _websocket(self, request):
+        from aiohttp import web, WSMsgType
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self._sockets.append(ws)
+        await ws.send_json({"type": "hello", "num_connections": len(self._sockets)})
+        self._connected.set()
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    envelope_id = json.loads(message.data).get("envelope_id")
+                    if envelope_id:
+                        self.acks.setdefault(envelope_id, time.perf_counter())
+        finally:
+            self._sockets.remove(ws)
+            if not self._sockets:
+                self._connected.clear()
+        return ws
+
+    async def wait_connected(self, timeout: float = 10.0):
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def send_event(self, body: Dict[str, Any], envelope_id: Optional[str] = None) -> str:
+        """Wrap an event_callback body in an events_api envelope and push it to the client"""
+        await self.wait_connected()
+        envelope_id = envelope_id or f"env-{body.get('event_id') or time.perf_counter()}"
+        await self._sockets[-1].send_json({
+            "type": "events_api", "envelope_id": envelope_id, "payload": body,
+            "accepts_response_payload": False, "retry_attempt": 0, "retry_reason": "",
+        })
+        return envelope_id
+
+    async def drop_connections(self):
+        """Close every socket, as Slack does on a server restart; the client should reconnect"""
+        for ws in list(self._sockets):
+            await ws.close()
@@ -0,0 +1,109 @@
+"""
+Microbenchmark the report renderers against the previous dict-building versions.
+
+    python -m benchmarks.render --sizes 10,100,1000 --iterations 200
+
+"legacy" builds Block Kit dicts / f-strings per member and serializes with the
+stdlib encoder (as slack_sdk does); "cold" renders with an empty fragment cache;
+"warm" re-renders a roster whose members are already cached.
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+from benchmarks.roster import generate_rows
+from benchmarks.run import percentile
+from models.schemas import ProgressReport, TeamMember
+from services import report_renderer
+from services.report_renderer import ReportRenderer
+
+def legacy_report_blocks(report: ProgressReport) -> List[dict]:
+    blocks = [
+        {"type": "header", "text": {"type": "plain_text", "text": f"📊 Daily Progress Report - {report.date.strftime('%Y-%m-%d')}"}},
+        {"type": "section", "text": {"type": "mrkdwn", "text": f"*Overall Progress:* {report.overall_progress}%"}},
+        {"type": "section", "text": {"type": "mrkdwn", "text": f"*Summary:*\n{report.summary}"}}
+    ]
+    for member in report.team_members:
+        blocks.extend([
+            {"type": "divider"},
+            {"type": "section", "text": {"type": "mrkdwn", "text": f"*{member.name}* ({member.role})\n"
+                                                                   f"Progress: {member.progress}%\n"
+                                                                   f"Tasks: {', '.join(member.tasks)}"}}
+        ])
+    if report.blockers:
+        blocks.extend([
+            {"type": "divider"},
+            {"type": "section", "text": {"type": "mrkdwn", "text": "*🚧 Blockers:*\n" + "\n".join([f"• {b}" for b in report.blockers])}}
+        ])
+    if report.recommendations:
+        blocks.extend([
+            {"type": "divider"},
+            {"type": "section", "text": {"type": "mrkdwn", "text": "*💡 Recommendations:*\n" + "\n".join([f"• {r}" for r in report.recommendations])}}
+        ])
+    return blocks
+
+def legacy_team_updates(team_members: List[TeamMember]) -> str:
+    return '\n\n'.join([
+        f"{member.name} ({member.role}):\n"
+        f"Progress: {member.progress}%\n"
+        f"Tasks: {', '.join(member.tasks)}"
+        for member in team_members
+    ])
+
+def build_report(size: int) -> ProgressReport:
+    members = []
+    for name, email, role, tasks, deadlines, progress in generate_rows(size):
+        members.append(TeamMember(
+            name=name, email=email, role=role,
+            tasks=tasks.split(", "),
+            deadlines=[datetime.strptime(d, '%Y-%m-%d') for d in deadlines.split(", ")],
+            progress=float(progress)
+        ))
+    return ProgressReport(
+        date=datetime(2026, 1, 1), team_members=members, overall_progress=42.5,
+        summary="Team is 42.5% complete with their tasks",
+        blockers=["Member 1 is behind on tasks with approaching deadlines"],
+        recommendations=["Consider redistributing tasks to balance workload"]
+    )
+
+def time_op(op: Callable[[], object], iterations: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        op()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark report rendering")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated roster sizes")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    encoder = "orjson" if report_renderer.orjson is not None else "json"
+    print(f"encoder: {encoder}")
+    print(f"{'operation':<34} {'n':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        report = build_report(size)
+        renderer = ReportRenderer(cache_size=size * 4)
+        # The serialized payload must match what the dict-building version sent
+        assert json.loads(renderer.report_blocks(report)) == legacy_report_blocks(report)
+        assert renderer.team_updates_text(report.team_members) == legacy_team_updates(report.team_members)
+
+        cases = [
+            ("slack blocks legacy", lambda: json.dumps(legacy_report_blocks(report)), None),
+            ("slack blocks cold", lambda: renderer.report_blocks(report), renderer.clear),
+            ("slack blocks warm", lambda: renderer.report_blocks(report), None),
+            ("email updates legacy", lambda: legacy_team_updates(report.team_members), None),
+            ("email updates", lambda: renderer.team_updates_text(report.team_members), None),
+        ]
+        for name, op, setup in cases:
+            samples = time_op(op, args.iterations, setup)
+            print(f"{name:<34} {size:>6} {percentile(samples, 50):>9.3f} {percentile(samples, 99):>9.3f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -0,0 +1,33 @@
+"""
+Synthetic team rosters in the shape of the Team!A2:F sheet range
+"""
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+ROLES = ["developer", "analyst", "qa_tester", "designer", "devops"]
+TASK_WORDS = ["API", "dashboard", "migration", "tests", "docs", "pipeline", "review", "release", "refactor", "audit"]
+
+def generate_rows(count: int, tasks_per_member: int = 3, seed: int = 0, start: datetime = None) -> List[List[str]]:
+    """Generate sheet rows: name, email, role, comma-separated tasks, comma-separated deadlines, progress"""
+    rng = random.Random(seed)
+    start = start or datetime(2026, 1, 1)
+    rows = []
+    for i in range(count):
+        tasks = [
+            f"{rng.choice(TASK_WORDS)} {rng.choice(TASK_WORDS)} #{i}-{t}"
+            for t in range(tasks_per_member)
+        ]
+        deadlines = [
+            (start + timedelta(days=rng.randint(-5, 30))).strftime('%Y-%m-%d')
+            for _ in range(tasks_per_member)
+        ]
+        rows.append([
+            f"Member {i}",
+            f"member{i}@example.com",
+            rng.choice(ROLES),
+            ", ".join(tasks),
+            ", ".join(deadlines),
+            str(rng.randint(0, 100))
+        ])
+    return rows
@@ -0,0 +1,214 @@
+"""
+Benchmark the report hot paths against local fakes.
+
+    python -m benchmarks.run --sizes 10,100,1000 --iterations 20
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json --max-regression 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from benchmarks.fakes import FakeBehavior, FakeLLM, FakeSheetsApi, FakeSlackClient, LocalSMTPServer
+from benchmarks.roster import generate_rows
+
+BENCH_SPREADSHEET_ID = "bench-sheet"
+BENCH_CHANNEL = "C0BENCH"
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class BenchEnvironment:
+    """Points every service at the fakes; must be installed before main is imported"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.sheets_api = FakeSheetsApi(FakeBehavior(latency=args.sheets_latency, error_rate=args.error_rate, seed=1))
+        self.llm = FakeLLM(FakeBehavior(latency=args.llm_latency, jitter=args.llm_latency / 4,
+                                        error_rate=args.error_rate, rate_limit=args.llm_rate_limit, seed=2))
+        self.slack = FakeSlackClient(FakeBehavior(latency=args.slack_latency, error_rate=args.error_rate, seed=3))
+        self.smtp_port = _free_port()
+        self.smtp: Optional[LocalSMTPServer] = None
+        self._state_dir = tempfile.mkdtemp(prefix="slack_team_bench_")
+
+    def install(self):
+        os.environ.update({
+            "GEMINI_API_KEY": "bench",
+            "SLACK_BOT_TOKEN": "xoxb-bench",
+            "GOOGLE_SHEETS_ID": BENCH_SPREADSHEET_ID,
+            "SLACK_DEFAULT_CHANNEL": BENCH_CHANNEL,
+            "MANAGER_EMAIL": "manager@example.com",
+            "EMAIL_USERNAME": "bench@example.com",
+            "EMAIL_PASSWORD": "",
+            "SMTP_SERVER": "127.0.0.1",
+            "SMTP_PORT": str(self.smtp_port),
+            "SMTP_USE_TLS": "false",
+            "STATE_DB_PATH": os.path.join(self._state_dir, "state.db"),
+            "ROSTER_CACHE_SECONDS": "0",
+            # Measure the LLM path, not responses cached or restored from an earlier run
+            "LLM_CACHE_SECONDS": "0",
+            "SNAPSHOT_PATH": "",
+        })
+        os.environ.pop("TENANTS_CONFIG", None)
+
+        import services.gemini_service as gemini_service
+        from services.sheets_service import GoogleSheetsService
+        from services.slack_service import SlackService
+        gemini_service.ChatGoogleGenerativeAI = lambda **kwargs: self.llm
+        GoogleSheetsService._get_api = lambda service: self.sheets_api
+        SlackService._clients["xoxb-bench"] = self.slack
+
+    def start_smtp(self) -> bool:
+        try:
+            self.smtp = LocalSMTPServer(port=self.smtp_port).__enter__()
+            return True
+        except ImportError as e:
+            print(f"Skipping SMTP scenarios: {str(e)}")
+            return False
+
+    def stop(self):
+        if self.smtp:
+            self.smtp.__exit__(None, None, None)
+
+    def load_roster(self, size: int):
+        self.sheets_api.sheets[BENCH_SPREADSHEET_ID] = generate_rows(size)
+
+async def measure(name: str, size: int, iterations: int, op: Callable[[], Awaitable]) -> Dict:
+    """Run op once to warm up, then time each iteration"""
+    await op()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await op()
+        samples.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    return {
+        "scenario": name,
+        "size": size,
+        "iterations": iterations,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "ops_per_s": iterations / total,
+        "members_per_s": size * iterations / total,
+    }
+
+def build_scenarios(env: BenchEnvironment, smtp_available: bool) -> Dict[str, Callable[[int], Callable[[], Awaitable]]]:
+    """Map scenario names to factories taking the roster size and returning one iteration"""
+    import main
+    from agents.report_agent import ReportAgent
+    from services.email_service import EmailService
+    from services.sheets_service import GoogleSheetsService
+    from services.role_aggregates import RoleAggregates
+
+    sheets = GoogleSheetsService()
+    email_service = EmailService()
+    report_agent = ReportAgent(sheets_service=sheets, email_service=email_service, slack_service=main.slack_service)
+
+    def members(size: int):
+        env.load_roster(size)
+        return asyncio.get_event_loop().run_until_complete(sheets.get_team_data())
+
+    scenarios = {
+        "sheets.get_team_data": lambda size: (env.load_roster(size), sheets.get_team_data)[1],
+        "spreadsheet_agent.get_formatted_emails": lambda size: (
+            lambda team=members(size): main.spreadsheet_agent.get_formatted_emails(team, main.tenants.get())
+        ),
+        "report_agent.analyze_team_progress": lambda size: (
+            lambda team=members(size): report_agent.analyze_team_progress(team)
+        ),
+        "report_agent.analyze_team_progress (aggregates)": lambda size: (
+            lambda team=members(size), aggregates=RoleAggregates(members(size)):
+                report_agent.analyze_team_progress(team, aggregates)
+        ),
+        "main.generate_and_send_report": lambda size: (
+            env.load_roster(size), lambda: main.generate_and_send_report(BENCH_CHANNEL)
+        )[1],
+    }
+    if smtp_available:
+        async def send_report(team):
+            report = await main.generate_progress_report(team)
+            await email_service.send_report(report)
+        async def send_progress_checks(team):
+            for member in team:
+                await email_service.send_progress_check(member)
+        scenarios["email_service.send_report"] = lambda size: (lambda team=members(size): send_report(team))
+        scenarios["email_service.send_progress_check"] = lambda size: (
+            lambda team=members(size): send_progress_checks(team)
+        )
+    return scenarios
+
+def compare(results: List[Dict], baseline_path: str, max_regression: float) -> List[str]:
+    """List scenarios whose p50 regressed beyond the allowed ratio"""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["size"]): r for r in json.load(f)}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["scenario"], result["size"]))
+        if previous and result["p50_ms"] > previous["p50_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{result['scenario']} n={result['size']}: p50 {previous['p50_ms']:.2f}ms -> {result['p50_ms']:.2f}ms"
+            )
+    return regressions
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark report hot paths against local fakes")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated roster sizes (up to 100000)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--scenario", action="append", help="Only run scenarios containing this substring")
+    parser.add_argument("--sheets-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-rate-limit", type=float, default=None, help="Fake LLM calls per second")
+    parser.add_argument("--slack-latency", type=float, default=0.03)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--save", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON to compare p50 against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    env = BenchEnvironment(args)
+    env.install()
+    smtp_available = env.start_smtp()
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    loop = asyncio.get_event_loop()
+    try:
+        scenarios = build_scenarios(env, smtp_available)
+        results = []
+        print(f"{'scenario':<42} {'n':>7} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>9} {'members/s':>11}")
+        for name, factory in scenarios.items():
+            if args.scenario and not any(s in name for s in args.scenario):
+                continue
+            for size in [int(s) for s in args.sizes.split(",")]:
+                op = factory(size)
+                result = loop.run_until_complete(measure(name, size, args.iterations, op))
+                results.append(result)
+                print(f"{name:<42} {size:>7} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} "
+                      f"{result['ops_per_s']:>9.2f} {result['members_per_s']:>11.0f}")
+    finally:
+        env.stop()
+        loop.close()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
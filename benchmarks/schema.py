@@ -0,0 +1,94 @@
+"""
+Microbenchmark the roster's layer boundaries against the previous per-row conversions.
+
+    python -m benchmarks.schema --sizes 100,1000,10000 --iterations 50
+
+"legacy" rebuilds each row for the next layer: FastAPI's dump-and-revalidate of
+a job result, model_validate per snapshot row, a comma-joined member_data dict
+that the Gemini prompt re-splits and strptimes, and the string-shaped
+src.models TeamMember. The other rows read the one TeamMember record through
+the views in models.roster.
+"""
+import argparse
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from fastapi.encoders import jsonable_encoder
+from benchmarks.render import build_report, time_op
+from benchmarks.run import percentile
+from models.roster import MemberMapping, SheetRowView, roster_dump, trusted_members
+from models.schemas import Job, TeamMember
+from services.gemini_service import GeminiService
+from services.prompt_builder import PromptBuilder
+
+class LegacySheetMember:
+    """The string-shaped model formerly in src/models/team_member.py"""
+
+    def __init__(self, email: str, name: str, role: str, work_target: str, deadline: str, progress: Optional[str]):
+        self.email, self.name, self.role = email, name, role
+        self.work_target, self.deadline, self.progress = work_target, deadline, progress
+
+def legacy_member_data(member: TeamMember) -> dict:
+    """The dict shape GeminiService.generate_email was handed: sheet strings, re-parsed by the prompt"""
+    return {
+        "name": member.name, "email": member.email, "role": member.role,
+        "tasks": ", ".join(member.tasks),
+        "deadlines": ", ".join(deadline.strftime('%Y-%m-%d') for deadline in member.deadlines),
+        "progress": member.progress,
+    }
+
+def legacy_sheet_member(member: TeamMember) -> LegacySheetMember:
+    return LegacySheetMember(
+        member.email, member.name, member.role, ", ".join(member.tasks),
+        ", ".join(deadline.strftime('%Y-%m-%d') for deadline in member.deadlines), f"{member.progress:g}"
+    )
+
+def prompt_service() -> GeminiService:
+    """Only _create_prompt is exercised, so the LLM client is never built"""
+    service = GeminiService.__new__(GeminiService)
+    service.prompt_builder = PromptBuilder()
+    return service
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark roster conversions between layers")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated roster sizes")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    gemini = prompt_service()
+    print(f"{'operation':<34} {'n':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        report = build_report(size)
+        members = report.team_members
+        job = Job(id=uuid.uuid4().hex, kind="generate_report", status="succeeded",
+                  created_at=datetime(2026, 1, 1), result=report)
+        dumped = roster_dump(members)
+
+        # Same outputs as the per-row conversions, and the views hand back the record's own objects
+        assert json.loads(job.model_dump_json()) == jsonable_encoder(Job.model_validate(job.model_dump()))
+        assert trusted_members(dumped) == [TeamMember.model_validate(row) for row in dumped]
+        assert all(MemberMapping(member)["tasks"] is member.tasks for member in members)
+        assert [m.content for m in gemini._create_prompt(members[0])] == \
+            [m.content for m in gemini._create_prompt(legacy_member_data(members[0]))]
+        assert vars(legacy_sheet_member(members[0])) == {
+            key: getattr(SheetRowView(members[0]), key) for key in vars(legacy_sheet_member(members[0]))
+        }
+
+        cases = [
+            ("api job json legacy", lambda: json.dumps(jsonable_encoder(Job.model_validate(job.model_dump())))),
+            ("api job json", job.model_dump_json),
+            ("snapshot restore legacy", lambda: [TeamMember.model_validate(row) for row in dumped]),
+            ("snapshot restore", lambda: trusted_members(dumped)),
+            ("gemini prompts legacy", lambda: [gemini._create_prompt(legacy_member_data(m)) for m in members]),
+            ("gemini prompts", lambda: [gemini._create_prompt(m) for m in members]),
+            ("sheet-shape rows legacy", lambda: [legacy_sheet_member(m) for m in members]),
+            ("sheet-shape rows", lambda: [SheetRowView(m) for m in members]),
+        ]
+        for name, op in cases:
+            samples = time_op(op, args.iterations)
+            print(f"{name:<34} {size:>6} {percentile(samples, 50):>9.3f} {percentile(samples, 99):>9.3f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -0,0 +1,231 @@
+"""
+Load-test the /slack/events endpoint with synthetic or recorded app_mention events.
+
+    python -m benchmarks.slack_load --rate 200 --duration 10
+    python -m benchmarks.slack_load --mix report=1,status=10,team=2 --rate 50
+    python -m benchmarks.slack_load --replay recorded_events.jsonl --rate 100
+    python -m benchmarks.slack_load --transport socket --rate 200
+    python -m benchmarks.slack_load --mix status --slack-latency 0.5 --rate 50 --duration 2 --workers 4
+
+The "status" mix only sends short replies; with slow Slack posts it fails (exit 1)
+as soon as a reply blocks the event loop that sends the acks.
+
+Events are sent straight to the ASGI app (no sockets), or with --transport socket
+over a local Socket Mode WebSocket, with every downstream service replaced by
+the fakes from benchmarks.fakes.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from benchmarks.run import BenchEnvironment, BENCH_CHANNEL, percentile
+
+ACK_DEADLINE_SECONDS = 3.0
+DEFAULT_MIX = "report=1,team=2,status=5,start=0.5,stop=0.5,help=1"
+# Named mixes accepted by --mix
+MIXES = {
+    "default": DEFAULT_MIX,
+    "status": "status=1",
+}
+
+def parse_mix(mix: str) -> Tuple[List[str], List[float]]:
+    mix = MIXES.get(mix, mix)
+    commands, weights = [], []
+    for part in mix.split(","):
+        command, weight = part.split("=")
+        commands.append(command.strip())
+        weights.append(float(weight))
+    return commands, weights
+
+def synthetic_payloads(count: int, mix: str, seed: int = 0) -> List[dict]:
+    """Build event_callback payloads with app_mention events drawn from the command mix"""
+    rng = random.Random(seed)
+    commands, weights = parse_mix(mix)
+    return [
+        {
+            "type": "event_callback",
+            "team_id": "T0BENCH",
+            "event_id": f"EvBENCH{i}",
+            "event": {
+                "type": "app_mention",
+                "user": f"U{rng.randint(1, 50)}",
+                "text": f"<@U0BOT> {rng.choices(commands, weights)[0]}",
+                "channel": BENCH_CHANNEL,
+                "ts": f"{1700000000 + i}.000100",
+            },
+        }
+        for i in range(count)
+    ]
+
+def recorded_payloads(path: str, count: int) -> List[dict]:
+    """Load recorded payloads (one JSON object per line), cycling them with fresh event ids"""
+    with open(path) as f:
+        recorded = [json.loads(line) for line in f if line.strip()]
+    payloads = []
+    for i in range(count):
+        payload = json.loads(json.dumps(recorded[i % len(recorded)]))
+        payload["event_id"] = f"EvREPLAY{i}"
+        payload.setdefault("event", {})["ts"] = f"{1700000000 + i}.000100"
+        payloads.append(payload)
+    return payloads
+
+async def post(app, path: str, body: bytes) -> Tuple[int, float]:
+    """Send one HTTP POST through the ASGI app, returning the status and the time to the full response"""
+    done = asyncio.Event()
+    status = 0
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("loadtest", 80),
+    }
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    await done.wait()
+    return status, time.perf_counter() - start
+
+async def run_load(payloads: List[dict], rate: float, transport: str = "http") -> Dict:
+    """Fire payloads open-loop at the given rate and collect ack and queueing latencies"""
+    import main
+    from benchmarks.fakes import LocalSocketModeServer
+    from services.socket_mode import SocketModeTransport
+
+    # Measured from the moment the event is posted, since the handler may start before the ack returns
+    sent_at: Dict[str, float] = {}
+    queue_delays: List[float] = []
+    handle_app_mention = main.event_dispatcher.handler
+
+    async def instrumented_handler(event):
+        ts = event.get("ts")
+        if ts in sent_at:
+            queue_delays.append(time.perf_counter() - sent_at[ts])
+        await handle_app_mention(event)
+
+    main.event_dispatcher.handler = instrumented_handler
+    acks: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    async def fire(payload: dict):
+        sent_at[payload["event"]["ts"]] = time.perf_counter()
+        status, latency = await post(main.app, "/slack/events", json.dumps(payload).encode())
+        acks.append(latency)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    if transport == "socket":
+        server = LocalSocketModeServer()
+        await server.start()
+        socket_mode = SocketModeTransport(main.event_dispatcher, url=server.url, enabled=True)
+        await socket_mode.start()
+        envelopes: Dict[str, float] = {}
+
+        async def fire(payload: dict):
+            sent_at[payload["event"]["ts"]] = time.perf_counter()
+            envelopes[await server.send_event(payload)] = sent_at[payload["event"]["ts"]]
+
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    tasks = []
+    for i, payload in enumerate(payloads):
+        delay = start + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(payload)))
+    await asyncio.gather(*tasks)
+    send_seconds = time.perf_counter() - start
+    await main.event_dispatcher.join()
+    drain_seconds = time.perf_counter() - start
+    if transport == "socket":
+        # An envelope that is never acked is redelivered by Slack, like a 503 over HTTP
+        await asyncio.sleep(0.1)
+        acked = {eid: server.acks[eid] - sent for eid, sent in envelopes.items() if eid in server.acks}
+        acks.extend(acked.values())
+        statuses = {"acked": len(acked), "unacked": len(envelopes) - len(acked)}
+        await socket_mode.stop()
+        await server.stop()
+    await main.event_dispatcher.stop()
+    main.event_dispatcher.handler = handle_app_mention
+
+    return {
+        "events": len(payloads),
+        "target_rate": rate,
+        "achieved_rate": len(payloads) / send_seconds,
+        "drain_seconds": drain_seconds,
+        "statuses": statuses,
+        "ack_p50_ms": percentile(acks, 50) * 1000,
+        "ack_p90_ms": percentile(acks, 90) * 1000,
+        "ack_p99_ms": percentile(acks, 99) * 1000,
+        "ack_max_ms": max(acks) * 1000,
+        "acks_over_deadline": sum(1 for ack in acks if ack > ACK_DEADLINE_SECONDS),
+        "queue_delay_p50_ms": percentile(queue_delays, 50) * 1000 if queue_delays else 0.0,
+        "queue_delay_p99_ms": percentile(queue_delays, 99) * 1000 if queue_delays else 0.0,
+    }
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test /slack/events against local fakes")
+    parser.add_argument("--rate", type=float, default=100, help="Events per second")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Command weights, e.g. report=1,status=5, or one of: {', '.join(MIXES)}")
+    parser.add_argument("--replay", help="JSONL file of recorded event_callback payloads")
+    parser.add_argument("--roster-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, help="Override SLACK_EVENT_WORKERS")
+    parser.add_argument("--sheets-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-rate-limit", type=float, default=None)
+    parser.add_argument("--slack-latency", type=float, default=0.03)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--transport", choices=["http", "socket"], default="http",
+                        help="POST to /slack/events, or push envelopes over a local Socket Mode WebSocket")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    env = BenchEnvironment(args)
+    env.install()
+    env.start_smtp()
+    env.load_roster(args.roster_size)
+    count = max(1, int(args.rate * args.duration))
+    payloads = recorded_payloads(args.replay, count) if args.replay else synthetic_payloads(count, args.mix)
+
+    import main
+    if args.workers:
+        main.event_dispatcher.worker_count = args.workers
+    try:
+        results = asyncio.run(run_load(payloads, args.rate, args.transport))
+    finally:
+        env.stop()
+    results["downstream_calls"] = {
+        "sheets": env.sheets_api.behavior.calls,
+        "llm": env.llm.behavior.calls,
+        "slack": env.slack.behavior.calls,
+        "smtp": env.smtp.messages if env.smtp else 0,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:<22} {value:.2f}" if isinstance(value, float) else f"{key:<22} {value}")
+    return 1 if results["acks_over_deadline"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
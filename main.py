@@ -1,17 +1,34 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 from crewai import Crew, Agent, Task
-from services.sheets_service import GoogleSheetsService
 from services.email_service import EmailService
 from services.slack_service import SlackService
-from models.schemas import TeamMember, ProgressReport
+from services.job_service import JobService, JobContext
+from services.event_dispatcher import EventDispatcher, EventQueueFull
+from services.socket_mode import SocketModeTransport
+from services.state_backend import create_state_backend
+from services.tenant_service import TenantRegistry, TenantContext
+from services.role_aggregates import RoleAggregates
+from services.single_flight import SingleFlight
+from services.report_renderer import renderer
+from services.snapshot import open_snapshot, save_state, restore_state
+from services.crew_runtime import CrewRuntime
+from services.time_context import current_time, pinned_time
+from services.profiler import SamplingProfiler, ProfilerBusy, LoopLagMonitor, dump_tasks
+from services.metrics import registry as metrics_registry, timed, trace_log, trace_id_var, new_trace_id, RETRIES
+from models.schemas import TeamMember, ProgressReport, Job
 from agents.spreadsheet_agent import SpreadsheetAgent
-from typing import List, Dict
+from agents.report_agent import ReportAgent
+from typing import List, Dict, Optional
 import asyncio
+import hmac
+import socket
+import time
+import uuid
 from datetime import datetime
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 
 # Load environment variables
@@ -29,17 +46,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Slack client directly
-slack_client = WebClient(token=os.getenv("SLACK_BOT_TOKEN"))
-
 # Initialize services
-sheets_service = GoogleSheetsService()
 email_service = EmailService()
 slack_service = SlackService()
+# Slack client shared with the service layer
+slack_client = slack_service.client
 spreadsheet_agent = SpreadsheetAgent()
+# Shares the app's clients; tenant-specific services are passed per call
+report_agent = ReportAgent(
+    sheets_service=spreadsheet_agent.sheets_service,
+    email_service=email_service,
+    slack_service=slack_service
+)
+# Monitoring state and job records live in the shared backend so every worker and replica agrees on them
+state = create_state_backend()
+job_service = JobService(state=state)
+tenants = TenantRegistry()
+# Concurrent identical report requests share one computation
+report_flights = SingleFlight()
+
+worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+SCHEDULER_LEASE = "monitoring_scheduler"
+SCHEDULER_LEASE_SECONDS = float(os.getenv('SCHEDULER_LEASE_SECONDS', '120'))
+SCHEDULER_POLL_SECONDS = float(os.getenv('SCHEDULER_POLL_SECONDS', '30'))
+MONITORING_INTERVAL_SECONDS = 24 * 60 * 60
 
-# Global state to track monitoring status
-monitoring_active = False
+def is_monitoring_active() -> bool:
+    """Check the shared monitoring flag"""
+    return bool(state.get("monitoring_active", False))
+
+def set_monitoring_active(active: bool):
+    """Update the shared monitoring flag"""
+    state.set("monitoring_active", active)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Assign each request a trace id that follows it into outbound calls"""
+    trace_id = request.headers.get("x-trace-id") or new_trace_id()
+    token = trace_id_var.set(trace_id)
+    try:
+        response = await call_next(request)
+    finally:
+        trace_id_var.reset(token)
+    response.headers["X-Trace-Id"] = trace_id
+    return response
 
 # Slack Events API endpoint
 @app.post("/slack/events")
@@ -55,15 +105,22 @@ async def slack_events(request: Request):
         # Handle actual events
         if body.get("type") == "event_callback":
             event = body.get("event", {})
+            # Slack's event id becomes the trace id for everything the event triggers
+            if body.get("event_id"):
+                trace_id_var.set(body["event_id"])
             
-            # Handle app mentions
+            # Handle app mentions after acking, so Slack gets its response well inside 3 seconds
             if event.get("type") == "app_mention":
-                await handle_app_mention(event)
+                await event_dispatcher.dispatch(event, body.get("event_id"))
             
             return {"status": "ok"}
         
         return {"status": "ok"}
         
+    except EventQueueFull as e:
+        # A non-2xx response makes Slack retry the event later
+        print(f"Error handling Slack event: {str(e)}")
+        return JSONResponse(status_code=503, content={"status": "error", "message": str(e)})
     except Exception as e:
         print(f"Error handling Slack event: {str(e)}")
         return {"status": "error", "message": str(e)}
@@ -71,21 +128,18 @@ async def slack_events(request: Request):
 async def send_slack_message(channel: str, text: str):
     """Send a message to Slack using the Web API"""
     try:
-        print(f"DEBUG: Attempting to send message to channel: {channel}")
-        print(f"DEBUG: Message content: {text[:100]}...")
+        trace_log("DEBUG", f"Sending message to channel {channel}: {text[:100]}...")
         
-        response = slack_client.chat_postMessage(
+        response = await slack_service.apost_message(
             channel=channel,
             text=text
         )
-        print(f"DEBUG: Message sent successfully: {response.get('ok')}")
         return response
     except SlackApiError as e:
-        print(f"ERROR: Slack API Error: {e.response['error']}")
-        print(f"ERROR: Full error response: {e.response}")
+        trace_log("ERROR", f"Slack API Error: {e.response['error']}")
         # Try to send error message to channel if possible
         try:
-            slack_client.chat_postMessage(
+            await slack_service.apost_message(
                 channel=channel,
                 text=f"❌ Bot error: {e.response['error']}"
             )
@@ -93,69 +147,57 @@ async def send_slack_message(channel: str, text: str):
             pass
         raise e
     except Exception as e:
-        print(f"ERROR: General error sending message: {str(e)}")
+        trace_log("ERROR", f"General error sending message: {str(e)}")
         raise e
 
+CHANNEL_NOT_CONFIGURED = "⚠️ This channel is not configured for any team. Add it to TENANTS_CONFIG to use the bot here."
+
 async def generate_and_send_report(channel: str):
     """Generate and send a detailed progress report to Slack"""
     try:
-        # Get team members from the sheets service
-        team_members = await sheets_service.get_team_data()
-        # Get formatted emails from the agent
-        formatted_emails = await spreadsheet_agent.get_formatted_emails(team_members)
+        tenant = tenants.for_channel(channel)
+        if tenant is None:
+            await send_slack_message(channel, CHANNEL_NOT_CONFIGURED)
+            return
+        # Get formatted emails, shared with any identical request already in flight
+        formatted_emails = await get_tenant_formatted_emails(tenant)
         
         if not formatted_emails:
             await send_slack_message(channel, "⚠️ No team members found in the spreadsheet. Please check your Google Sheets data.")
             return
             
-        # Format report using Slack blocks
-        report_blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": "📊 Team Progress Report"
-                }
-            },
-            {"type": "divider"}
-        ]
-        
-        for email, content in formatted_emails:
-            report_blocks.append({
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*{email}*\n{content}"
-                }
-            })
-        
-        # Add summary section
-        report_blocks.append({"type": "divider"})
-        report_blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"📈 *Total Team Members*: {len(formatted_emails)}"
-            }
-        })
-        
-        # Send formatted report to Slack
-        slack_client.chat_postMessage(
+        # Send formatted report to Slack as serialized Block Kit
+        await slack_service.apost_message(
             channel=channel,
-            blocks=report_blocks
+            blocks=renderer.email_digest_blocks(formatted_emails)
         )
         
     except Exception as e:
         await send_slack_message(channel, f"❌ Report error: {str(e)}")
         print(f"Error in generate_and_send_report: {str(e)}")
 
+@pinned_time
+async def get_tenant_formatted_emails(tenant: TenantContext) -> List[tuple]:
+    """Generate a tenant's emails once per roster version, however many callers ask concurrently"""
+    team_members = await tenant.get_team_data()
+    key = ("formatted_emails", tenant.id, tenant.roster_version)
+    return await report_flights.do(
+        key,
+        lambda: spreadsheet_agent.get_formatted_emails(team_members, tenant),
+        operation="formatted_emails"
+    )
+
+@pinned_time
 async def handle_app_mention(event):
     """Handle when the bot is mentioned in a channel"""
-    global monitoring_active  # Needed to modify the global variable
-    
     try:
         text = event.get("text", "").lower()
         channel = event.get("channel")
+        tenant = tenants.for_channel(channel)
+        if tenant is None:
+            # Never answer with another team's roster, progress or emails
+            await send_slack_message(channel, CHANNEL_NOT_CONFIGURED)
+            return
         
         if "report1" in text or "report" in text:
             # Show processing message
@@ -163,22 +205,29 @@ async def handle_app_mention(event):
             await generate_and_send_report(channel)
             
         elif "status" in text:
-            status = "active" if monitoring_active else "inactive"
-            await send_slack_message(channel, f"🔄 Current monitoring status: **{status}**")
+            status = "active" if await asyncio.to_thread(is_monitoring_active) else "inactive"
+            message = f"🔄 Current monitoring status: **{status}**"
+            aggregates = tenant.aggregates
+            if len(aggregates):
+                # From the running aggregates, without touching the sheet or the roster
+                message += (
+                    f"\n📈 Team progress: {aggregates.overall_progress:.1f}% across {len(aggregates)} members, "
+                    f"{aggregates.blocker_count()} behind with deadlines approaching"
+                )
+            await send_slack_message(channel, message)
             
         elif "stop" in text:
-            monitoring_active = False
+            await asyncio.to_thread(set_monitoring_active, False)
             await send_slack_message(channel, "⏹️ Monitoring stopped successfully!")
             
         elif "start" in text:
-            monitoring_active = True
             await send_slack_message(channel, "🚀 Monitoring started successfully!")
             await start_monitoring_internal()
             
         elif "team" in text or "members" in text:
             try:
                 # Get team members directly from Google Sheets
-                team_data = await sheets_service.get_team_data()
+                team_data = await tenant.get_team_data()
                 member_list = "\n".join([f"• {member.email}" for member in team_data])
                 await send_slack_message(channel, f"👥 **Team Members**:\n{member_list}")
             except Exception as e:
@@ -205,8 +254,7 @@ async def handle_app_mention(event):
 @app.post("/api/start-monitoring")
 async def start_monitoring():
     """Start the team progress monitoring process"""
-    global monitoring_active
-    if monitoring_active:
+    if await asyncio.to_thread(is_monitoring_active):
         raise HTTPException(status_code=400, detail="Monitoring is already active")
     
     try:
@@ -217,67 +265,159 @@ async def start_monitoring():
 
 async def start_monitoring_internal():
     """Internal function to start monitoring"""
-    global monitoring_active
-    monitoring_active = True
+    # Only the flag is set here; whichever worker holds the scheduler lease runs the cycle
+    await asyncio.to_thread(set_monitoring_active, True)
+    await asyncio.to_thread(state.delete, "monitoring_last_run")
+
+def build_monitoring_crew() -> Crew:
+    """Build the crew run on each monitoring cycle"""
+    # Create CrewAI agents
+    progress_agent = Agent(
+        role="Progress Checker",
+        goal="Check team members' progress and send reminder emails",
+        backstory="I am an AI agent responsible for monitoring team progress and ensuring timely updates."
+    )
     
-    try:
-        # Create CrewAI agents
-        progress_agent = Agent(
-            role="Progress Checker",
-            goal="Check team members' progress and send reminder emails",
-            backstory="I am an AI agent responsible for monitoring team progress and ensuring timely updates."
-        )
-        
-        report_agent = Agent(
-            role="Report Generator", 
-            goal="Generate comprehensive progress reports for managers",
-            backstory="I am an AI agent specialized in analyzing team progress and creating detailed reports."
-        )
-        
-        # Create tasks with expected_output
-        progress_task = Task(
-            description="Check team progress and send reminder emails",
-            agent=progress_agent,
-            expected_output="A summary of team members who need progress updates and confirmation that reminder emails were sent"
-        )
-        
-        report_task = Task(
-            description="Generate daily progress report",
-            agent=report_agent,
-            expected_output="A comprehensive daily progress report containing team member status, overall progress percentage, and recommendations"
-        )
-        
-        # Create and run the crew
-        crew = Crew(
-            agents=[progress_agent, report_agent],
-            tasks=[progress_task, report_task],
-            verbose=True
-        )
-        
-        # Start the monitoring process in the background
-        asyncio.create_task(run_monitoring_cycle(crew))
-        
-    except Exception as e:
-        monitoring_active = False  # Reset status on error
-        raise e
+    report_agent = Agent(
+        role="Report Generator", 
+        goal="Generate comprehensive progress reports for managers",
+        backstory="I am an AI agent specialized in analyzing team progress and creating detailed reports."
+    )
+    
+    # Create tasks with expected_output
+    progress_task = Task(
+        description="Check team progress and send reminder emails",
+        agent=progress_agent,
+        expected_output="A summary of team members who need progress updates and confirmation that reminder emails were sent"
+    )
+    
+    report_task = Task(
+        description="Generate daily progress report",
+        agent=report_agent,
+        expected_output="A comprehensive daily progress report containing team member status, overall progress percentage, and recommendations"
+    )
+    
+    # Create the crew
+    crew = Crew(
+        agents=[progress_agent, report_agent],
+        tasks=[progress_task, report_task],
+        verbose=True
+    )
+    return crew
+
+# Built on the first cycle and reused, with per-run context, results and agent memory capped
+monitoring_crew = CrewRuntime(build_monitoring_crew)
 
 @app.get("/api/status")
 async def get_status():
     """Get the current monitoring status"""
-    return {"status": "active" if monitoring_active else "inactive"}
+    return {"status": "active" if await asyncio.to_thread(is_monitoring_active) else "inactive"}
+
+def get_tenant(tenant_id: Optional[str]) -> TenantContext:
+    """Resolve a tenant id from a request, defaulting to the first configured tenant"""
+    try:
+        return tenants.get(tenant_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-@app.post("/api/generate-report")
-async def generate_report():
-    """Manually trigger report generation"""
+@app.post("/api/generate-report", status_code=202)
+async def generate_report(tenant: Optional[str] = None):
+    """Queue report generation and return the job id immediately"""
+    tenant_id = get_tenant(tenant).id
     try:
-        team_data = await sheets_service.get_team_data()
-        report = await generate_progress_report(team_data)
-        await email_service.send_report(report)
-        return {"message": "Report generated and sent successfully"}
+        job = await job_service.submit("generate_report", {"tenant": tenant_id})
+        return {"message": "Report generation queued", "job_id": job.id, "status": job.status}
     except Exception as e:
         print(f"Error in generate_report: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    """Get the status, stage timings and result of a job"""
+    # Jobs run by other workers are read from the shared state
+    content = await job_service.get_json(job_id)
+    if not content:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    # Serialized straight from the stored models; returning the Job would re-dump and revalidate every roster row
+    return Response(content=content, media_type="application/json")
+
+@pinned_time
+async def run_report_job(ctx: JobContext, payload: dict) -> ProgressReport:
+    """Fetch the roster, build the progress report and email it to the manager"""
+    tenant = tenants.get(payload.get("tenant"))
+    async with ctx.stage("sheets_fetch"):
+        team_data = await tenant.get_team_data()
+    async with ctx.stage("analysis"):
+        analysis = await report_agent.analyze_team_progress(team_data, tenant.aggregates)
+        report = await generate_progress_report(team_data, tenant.aggregates, analysis)
+    async with ctx.stage("email_send"):
+        await email_service.send_report(report, tenant.tenant.manager_email)
+    return report
+
+job_service.register("generate_report", run_report_job)
+event_dispatcher = EventDispatcher(handle_app_mention)
+socket_mode = SocketModeTransport(event_dispatcher)
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Start the report job workers"""
+    await job_service.start()
+
+@app.on_event("startup")
+async def start_monitoring_scheduler():
+    """Start this worker's monitoring scheduler; it idles unless it holds the lease"""
+    app.state.monitoring_scheduler = asyncio.create_task(run_monitoring_scheduler())
+
+@app.on_event("shutdown")
+async def stop_monitoring_scheduler():
+    """Stop the monitoring scheduler and hand the lease to another worker"""
+    app.state.monitoring_scheduler.cancel()
+    await asyncio.gather(app.state.monitoring_scheduler, return_exceptions=True)
+
+@app.on_event("startup")
+async def start_event_workers():
+    """Start the Slack event workers"""
+    await event_dispatcher.start()
+
+@app.on_event("startup")
+async def start_socket_mode():
+    """Receive Slack events over Socket Mode when SLACK_SOCKET_MODE=true; /slack/events keeps working either way"""
+    await socket_mode.start()
+
+@app.on_event("shutdown")
+async def stop_socket_mode():
+    """Close the socket before the event workers stop, so no envelope is acked without a worker to run it"""
+    await socket_mode.stop()
+
+@app.on_event("shutdown")
+async def stop_event_workers():
+    """Stop the Slack event workers"""
+    await event_dispatcher.stop()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    """Stop the report job workers"""
+    await job_service.stop()
+
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', '')
+
+@app.on_event("startup")
+async def load_snapshot():
+    """Map the last snapshot so caches warm up from it instead of the APIs"""
+    snapshot = open_snapshot(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+    if snapshot:
+        restore_state(snapshot, tenants, renderer, spreadsheet_agent.gemini_service.response_cache)
+
+@app.on_event("shutdown")
+async def write_snapshot():
+    """Save rosters, rendered fragments and LLM responses for the next start"""
+    if not SNAPSHOT_PATH:
+        return
+    try:
+        await asyncio.to_thread(save_state, SNAPSHOT_PATH, tenants, renderer, spreadsheet_agent.gemini_service.response_cache)
+    except Exception as e:
+        print(f"Error writing snapshot: {str(e)}")
+
 @app.get("/test-slack")
 async def test_slack():
     try:
@@ -299,11 +439,11 @@ async def test_slack():
         return {"status": "error", "message": str(e)}
 
 @app.get("/api/formatted-emails")
-async def get_formatted_emails():
+async def get_formatted_emails(tenant: Optional[str] = None):
     """Get formatted email content for all team members"""
+    tenant_context = get_tenant(tenant)
     try:
-        team_members = await sheets_service.get_team_data()
-        formatted_emails = await spreadsheet_agent.get_formatted_emails(team_members)
+        formatted_emails = await get_tenant_formatted_emails(tenant_context)
         return {
             "status": "success", 
             "data": formatted_emails
@@ -312,32 +452,99 @@ async def get_formatted_emails():
         print(f"Error in get_formatted_emails: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def run_monitoring_cycle(crew: Crew):
-    """Run the monitoring cycle periodically"""
-    while monitoring_active:
+async def run_monitoring_scheduler():
+    """Run monitoring cycles on whichever worker holds the scheduler lease"""
+    # State calls block (SQLite file locks, Redis round trips), so they run off the event loop
+    while True:
         try:
-            result = crew.kickoff()
-            await asyncio.sleep(24 * 60 * 60)  # Wait 24 hours
+            if await asyncio.to_thread(is_monitoring_active) and await asyncio.to_thread(
+                state.acquire_lease, SCHEDULER_LEASE, worker_id, SCHEDULER_LEASE_SECONDS
+            ):
+                last_run = await asyncio.to_thread(state.get, "monitoring_last_run", 0)
+                if time.time() - last_run >= MONITORING_INTERVAL_SECONDS:
+                    # Recorded before kickoff so a new leader never repeats a cycle in progress
+                    await asyncio.to_thread(state.set, "monitoring_last_run", time.time())
+                    with timed("crew_kickoff"):
+                        await asyncio.to_thread(monitoring_crew.kickoff)
+            await asyncio.sleep(SCHEDULER_POLL_SECONDS)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(state.release_lease, SCHEDULER_LEASE, worker_id)
+            raise
         except Exception as e:
             print(f"Error in monitoring cycle: {str(e)}")
+            RETRIES.inc(operation="monitoring_cycle")
             await asyncio.sleep(60)
 
-async def generate_progress_report(team_data: List[TeamMember]) -> ProgressReport:
+async def generate_progress_report(team_data: List[TeamMember],
+                                   aggregates: Optional[RoleAggregates] = None,
+                                   analysis: Optional[dict] = None) -> ProgressReport:
     """Generate a progress report from team data"""
     if not team_data:
         raise ValueError("No team data available")
         
-    overall_progress = sum(member.progress for member in team_data) / len(team_data)
+    if aggregates is not None and len(aggregates) == len(team_data):
+        # The tenant's running sums, one row per sheet row, instead of another pass over the roster
+        overall_progress = aggregates.overall_progress
+    else:
+        overall_progress = sum(member.progress for member in team_data) / len(team_data)
     
     return ProgressReport(
-        date=datetime.now(),
+        date=current_time().now,
         team_members=team_data,
         overall_progress=overall_progress,
         summary=f"Team is {overall_progress:.1f}% complete with their tasks",
-        blockers=[],
-        recommendations=[]
+        blockers=analysis["blockers"] if analysis else [],
+        recommendations=analysis["recommendations"] if analysis else []
     )
 
+@app.get("/metrics")
+async def metrics():
+    """Expose metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics_registry.render(), media_type=metrics_registry.CONTENT_TYPE)
+
+# Opt-in diagnostics: enabled only when ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+profiler = SamplingProfiler()
+loop_lag_monitor = LoopLagMonitor()
+
+def require_admin(request: Request):
+    """Reject admin requests unless diagnostics are enabled and the token matches"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profile")
+async def admin_profile(request: Request, seconds: float = 10.0, interval: float = 0.005):
+    """Sample all threads for a bounded time and return collapsed stacks (flame graph input)"""
+    require_admin(request)
+    try:
+        stacks = await asyncio.to_thread(profiler.profile, seconds, interval)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(stacks)
+
+@app.get("/admin/tasks")
+async def admin_tasks(request: Request):
+    """Dump the stack of every pending asyncio task"""
+    require_admin(request)
+    return PlainTextResponse(dump_tasks())
+
+@app.get("/admin/crew")
+async def admin_crew(request: Request):
+    """Per-task timing and memory of the last monitoring crew run"""
+    require_admin(request)
+    return {"runs": monitoring_crew.runs, "last_run": monitoring_crew.last_run}
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    """Log the blocking stack whenever the event loop stalls past LOOP_LAG_THRESHOLD_SECONDS"""
+    await loop_lag_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_loop_lag_monitor():
+    await loop_lag_monitor.stop()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,86 @@
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional
+from pydantic import TypeAdapter
+from models.schemas import TeamMember
+
+# TeamMember is the one roster record: validated once when a sheet row is parsed,
+# then shared by reference. Consumers wanting another shape get a view over it, not a copy.
+
+ROSTER_ADAPTER = TypeAdapter(List[TeamMember])
+DATE_FORMAT = '%Y-%m-%d'
+MEMBER_KEYS = ('name', 'email', 'role', 'tasks', 'deadlines', 'progress')
+
+class MemberMapping(Mapping):
+    """Read-only dict view of a member, for code that takes member_data dicts (GeminiService.generate_email)"""
+
+    __slots__ = ('_member',)
+
+    def __init__(self, member: TeamMember):
+        self._member = member
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in MEMBER_KEYS:
+            raise KeyError(key)
+        return getattr(self._member, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(MEMBER_KEYS)
+
+    def __len__(self) -> int:
+        return len(MEMBER_KEYS)
+
+    @property
+    def member(self) -> TeamMember:
+        return self._member
+
+class SheetRowView:
+    """A member in the sheet's string shape (work_target, deadline), formatted only when read"""
+
+    __slots__ = ('_member',)
+
+    def __init__(self, member: TeamMember):
+        self._member = member
+
+    @property
+    def email(self) -> str:
+        return self._member.email
+
+    @property
+    def name(self) -> str:
+        return self._member.name
+
+    @property
+    def role(self) -> str:
+        return self._member.role
+
+    @property
+    def work_target(self) -> str:
+        return ", ".join(self._member.tasks)
+
+    @property
+    def deadline(self) -> str:
+        """Comma-separated ISO dates, as in the sheet's deadline column"""
+        return ", ".join(deadline.strftime(DATE_FORMAT) for deadline in self._member.deadlines)
+
+    @property
+    def progress(self) -> Optional[str]:
+        return None if self._member.progress is None else f"{self._member.progress:g}"
+
+def roster_dump(team_members: List[TeamMember]) -> List[dict]:
+    """JSON-compatible dicts for snapshot codecs, in one pass"""
+    return ROSTER_ADAPTER.dump_python(team_members, mode="json")
+
+def trusted_members(rows: Iterable[dict]) -> List[TeamMember]:
+    """Rebuild members from roster_dump output without revalidating them (e.g. a schema-checked snapshot)"""
+    return [
+        TeamMember.model_construct(
+            name=row['name'],
+            email=row['email'],
+            role=row['role'],
+            tasks=row['tasks'],
+            deadlines=[datetime.fromisoformat(deadline) for deadline in row['deadlines']],
+            progress=row.get('progress', 0.0)
+        )
+        for row in rows
+    ]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -33,4 +33,36 @@ class EmailTemplate(BaseModel):
 class SlackMessage(BaseModel):
     channel: str
     text: str
-    blocks: Optional[List[dict]] = None 
\ No newline at end of file
+    blocks: Optional[List[dict]] = None
+
+class Tenant(BaseModel):
+    id: str
+    spreadsheet_id: Optional[str] = None
+    channel: Optional[str] = None
+    manager_email: Optional[EmailStr] = None
+    llm_concurrency: int = 4  # Max in-flight LLM calls for this tenant
+
+class ConfiguredTenant(Tenant):
+    """A TENANTS_CONFIG entry; left out, these would fall back to another team's single-team env vars"""
+    spreadsheet_id: str = Field(min_length=1)
+    channel: str = Field(min_length=1)
+    manager_email: EmailStr
+
+class JobStage(BaseModel):
+    name: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+
+class Job(BaseModel):
+    id: str
+    kind: str  # generate_report
+    status: str  # queued, running, succeeded, failed
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    stages: List[JobStage] = []
+    result: Optional[ProgressReport] = None
+    error: Optional[str] = None
+    dedup_key: Optional[str] = None
+    trace_id: Optional[str] = None
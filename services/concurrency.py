@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+from services.metrics import is_rate_limit_error, LLM_CONCURRENCY_LIMIT, LLM_IN_FLIGHT, LLM_QUEUE_DEPTH
+
+class FairLimiter:
+    """Global concurrency limit shared by tenants, granted round-robin within per-tenant budgets"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._in_use = 0
+        self._tenant_in_use: Dict[str, int] = defaultdict(int)
+        self._budgets: Dict[str, int] = {}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._order: Deque[str] = deque()
+
+    def set_budget(self, tenant_id: str, budget: int):
+        """Cap the number of slots one tenant may hold at once"""
+        self._budgets[tenant_id] = budget
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a slot"""
+        return sum(
+            sum(1 for fut in waiters if not fut.done())
+            for waiters in self._waiters.values()
+        )
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: str):
+        """Hold one slot for the duration of the block"""
+        await self.acquire(tenant_id)
+        try:
+            yield
+        finally:
+            self.release(tenant_id)
+
+    async def acquire(self, tenant_id: str):
+        """Wait for a slot; tenants with waiters are served in turn"""
+        if tenant_id not in self._waiters and self._has_room(tenant_id):
+            self._grant(tenant_id)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        if tenant_id not in self._waiters:
+            self._waiters[tenant_id] = deque()
+            self._order.append(tenant_id)
+        self._waiters[tenant_id].append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # The slot may have been granted just before cancellation
+            if fut.done() and not fut.cancelled():
+                self.release(tenant_id)
+            raise
+
+    def release(self, tenant_id: str):
+        """Return a slot and hand it to the next tenant in turn"""
+        self._in_use -= 1
+        self._tenant_in_use[tenant_id] -= 1
+        self._wake()
+
+    def _has_room(self, tenant_id: str) -> bool:
+        return (
+            self._in_use < self.capacity
+            and self._tenant_in_use[tenant_id] < self._budgets.get(tenant_id, self.capacity)
+        )
+
+    def _grant(self, tenant_id: str):
+        self._in_use += 1
+        self._tenant_in_use[tenant_id] += 1
+
+    def _wake(self):
+        """Grant free slots to waiting tenants round-robin"""
+        skipped = 0
+        while self._order and self._in_use < self.capacity and skipped < len(self._order):
+            tenant_id = self._order.popleft()
+            waiters = self._waiters[tenant_id]
+            while waiters and waiters[0].done():
+                waiters.popleft()
+            if not waiters:
+                del self._waiters[tenant_id]
+                continue
+            if not self._has_room(tenant_id):
+                self._order.append(tenant_id)
+                skipped += 1
+                continue
+            self._grant(tenant_id)
+            waiters.popleft().set_result(None)
+            skipped = 0
+            if waiters:
+                self._order.append(tenant_id)
+            else:
+                del self._waiters[tenant_id]
+
+class AdaptiveLimiter(FairLimiter):
+    """FairLimiter whose global capacity follows AIMD: grow while calls are healthy, halve on quota errors"""
+
+    def __init__(self, initial_limit: Optional[int] = None, min_limit: Optional[int] = None,
+                 max_limit: Optional[int] = None, latency_target: Optional[float] = None,
+                 backoff: float = 0.5, error_threshold: float = 0.2):
+        self.min_limit = min_limit or int(os.getenv('LLM_MIN_CONCURRENCY', '1'))
+        self.max_limit = max_limit or int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+        self.latency_target = latency_target or float(os.getenv('LLM_LATENCY_TARGET_SECONDS', '10'))
+        self.backoff = backoff
+        self.error_threshold = error_threshold
+        self._limit = float(initial_limit or int(os.getenv('LLM_INITIAL_CONCURRENCY', '2')))
+        self._error_rate = 0.0  # Exponentially weighted
+        self._latency = 0.0  # Exponentially weighted call latency
+        self._last_decrease = 0.0
+        super().__init__(self._capacity())
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        return self.capacity
+
+    def _capacity(self) -> int:
+        return max(self.min_limit, min(self.max_limit, int(self._limit)))
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: str):
+        """Hold one slot and feed the call's outcome back into the limit"""
+        await self.acquire(tenant_id)
+        self._publish()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.on_rate_limited()
+            else:
+                self.on_error()
+            raise
+        else:
+            self.on_success(time.monotonic() - start)
+        finally:
+            self.release(tenant_id)
+            self._publish()
+
+    def on_success(self, latency: float):
+        """Additive increase: about one extra slot per limit's worth of healthy calls"""
+        self._error_rate *= 0.9
+        self._latency = latency if not self._latency else self._latency * 0.9 + latency * 0.1
+        if latency > self.latency_target:
+            self._decrease()
+            return
+        if self._in_use >= self.capacity - 1:
+            # Only grow when the current limit is actually being used
+            self._limit = min(self.max_limit, self._limit + 1.0 / max(self._limit, 1.0))
+            self._resize()
+
+    def on_rate_limited(self):
+        """Multiplicative decrease on 429 / RESOURCE_EXHAUSTED"""
+        self._decrease()
+
+    def on_error(self):
+        """Back off only when errors become frequent; isolated failures are not congestion"""
+        self._error_rate = self._error_rate * 0.9 + 0.1
+        if self._error_rate > self.error_threshold:
+            self._decrease()
+
+    def _decrease(self):
+        now = time.monotonic()
+        # Calls already in flight report the same congestion; back off once per round trip
+        if now - self._last_decrease < self._latency:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+        self._resize()
+
+    def _resize(self):
+        self.capacity = self._capacity()
+        self._wake()
+        self._publish()
+
+    def _publish(self):
+        LLM_CONCURRENCY_LIMIT.set(self.capacity)
+        LLM_IN_FLIGHT.set(self._in_use)
+        LLM_QUEUE_DEPTH.set(self.queue_depth)
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from crewai import Crew
+from crewai.tools.agent_tools import AgentTools
+from services.metrics import CREW_TASK_SECONDS, CREW_TASK_PEAK_BYTES
+
+def _cap(text: Optional[str], limit: int) -> Optional[str]:
+    if text is None or limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n[... {len(text) - limit} characters truncated]"
+
+class CrewRuntime:
+    """Builds a crew once and reruns it every cycle with bounded context, results and agent memory"""
+
+    def __init__(self, build: Callable[[], Crew], max_context_chars: Optional[int] = None,
+                 max_result_chars: Optional[int] = None, max_memory_chars: Optional[int] = None,
+                 trace_memory: Optional[bool] = None):
+        self._build = build
+        self.max_context_chars = max_context_chars if max_context_chars is not None else int(os.getenv('CREW_MAX_CONTEXT_CHARS', '4000'))
+        self.max_result_chars = max_result_chars if max_result_chars is not None else int(os.getenv('CREW_MAX_RESULT_CHARS', '8000'))
+        self.max_memory_chars = max_memory_chars if max_memory_chars is not None else int(os.getenv('CREW_MAX_MEMORY_CHARS', '2000'))
+        self.trace_memory = trace_memory if trace_memory is not None else os.getenv('CREW_TRACE_MEMORY', 'false').lower() == 'true'
+        self._crew: Optional[Crew] = None
+        self._task_tools: Dict[int, list] = {}
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_run: List[Dict[str, Any]] = []
+
+    @property
+    def crew(self) -> Crew:
+        """The crew, built on first use; agents, their LLM clients and tools are reused by every run"""
+        if self._crew is None:
+            crew = self._build()
+            # Crew.kickoff appends delegation tools to each task on every run; build them once instead
+            delegation_tools = AgentTools(agents=crew.agents).tools()
+            self._task_tools = {
+                id(task): list(task.tools) + (delegation_tools if task.agent.allow_delegation else [])
+                for task in crew.tasks
+            }
+            self._crew = crew
+        return self._crew
+
+    def kickoff(self) -> Optional[str]:
+        """Run the tasks in order like a sequential crew and return the last task's (capped) output; blocking"""
+        with self._lock:
+            crew = self.crew
+            started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            stats = []
+            outcome = None
+            try:
+                for task in crew.tasks:
+                    outcome = self._run_task(task, outcome, stats)
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+                self.runs += 1
+                self.last_run = stats
+            return outcome
+
+    def _run_task(self, task, context: Optional[str], stats: List[Dict[str, Any]]) -> Optional[str]:
+        agent = task.agent.role
+        task.tools = self._task_tools[id(task)]
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        entry: Dict[str, Any] = {"agent": agent, "task": task.description}
+        try:
+            result = _cap(task.execute(_cap(context, self.max_context_chars)), self.max_result_chars)
+            entry["result_chars"] = len(result or "")
+            return result
+        except Exception as e:
+            entry["error"] = str(e)
+            raise
+        finally:
+            entry["seconds"] = time.perf_counter() - start
+            CREW_TASK_SECONDS.observe(entry["seconds"], agent=agent)
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                # Traced across all threads, so concurrent requests show up here too
+                entry["retained_bytes"] = current - before
+                entry["peak_bytes"] = peak - before
+                CREW_TASK_PEAK_BYTES.set(entry["peak_bytes"], agent=agent)
+            self._trim_memory(task.agent)
+            stats.append(entry)
+            print(f"Crew task '{agent}' took {entry['seconds']:.2f}s"
+                  + (f", peak {entry['peak_bytes'] / 1e6:.1f} MB" if tracing else ""))
+
+    def _trim_memory(self, agent):
+        """Keep the running summary, capped, but drop the raw messages it was built from"""
+        # agent_executor is crewai internals; skip trimming if a version lays the agent out differently
+        memory = getattr(getattr(agent, 'agent_executor', None), 'memory', None)
+        if memory is None:
+            return
+        chat_memory = getattr(memory, 'chat_memory', None)
+        if chat_memory is not None:
+            chat_memory.clear()
+        buffer = getattr(memory, 'buffer', None)
+        if isinstance(buffer, str) and self.max_memory_chars > 0 and len(buffer) > self.max_memory_chars:
+            memory.buffer = buffer[-self.max_memory_chars:]
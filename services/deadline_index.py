@@ -0,0 +1,85 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from models.schemas import TeamMember
+from services.time_context import current_time
+
+# (deadline, member, task)
+DeadlineEntry = Tuple[datetime, TeamMember, str]
+
+class DeadlineIndex:
+    """Every task deadline in a roster, sorted by epoch time for bisect range queries; members are referred to by roster position"""
+
+    def __init__(self, team_members: Sequence[TeamMember]):
+        self.team_members = team_members if isinstance(team_members, list) else list(team_members)
+        entries = []
+        self._next: Dict[int, datetime] = {}
+        for position, member in enumerate(self.team_members):
+            for task, deadline in zip(member.tasks, member.deadlines):
+                entries.append((deadline.timestamp(), position, task, deadline))
+            if member.deadlines:
+                self._next[position] = min(member.deadlines)
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        self._times = [entry[0] for entry in entries]
+        self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def for_roster(cls, team_members: Sequence[TeamMember], index: Optional["DeadlineIndex"] = None) -> "DeadlineIndex":
+        """Reuse a maintained index when its positions line up with team_members, else build one"""
+        if index is not None and index.covers(team_members):
+            return index
+        return cls(team_members)
+
+    def covers(self, team_members: Sequence[TeamMember]) -> bool:
+        """Same members, tasks and deadlines in the same order; progress may differ"""
+        if team_members is self.team_members:
+            return True
+        return len(team_members) == len(self.team_members) and all(
+            new.email == old.email and new.deadlines == old.deadlines and new.tasks == old.tasks
+            for new, old in zip(team_members, self.team_members)
+        )
+
+    def between(self, start: Optional[datetime], end: datetime, inclusive_end: bool = False) -> List[DeadlineEntry]:
+        """Deadlines in [start, end) (or [start, end]); start=None means from the earliest"""
+        low = 0 if start is None else bisect_left(self._times, start.timestamp())
+        high = (bisect_right if inclusive_end else bisect_left)(self._times, end.timestamp())
+        return [
+            (deadline, self.team_members[position], task)
+            for _, position, task, deadline in self._entries[low:high]
+        ]
+
+    def due_within(self, days: int, now: Optional[datetime] = None, include_overdue: bool = True) -> List[DeadlineEntry]:
+        """Deadlines with (deadline - now).days <= days, the whole-day rule the agents use"""
+        return [
+            (deadline, self.team_members[position], task)
+            for _, position, task, deadline in self._due_slice(days, now, include_overdue)
+        ]
+
+    def overdue(self, now: Optional[datetime] = None) -> List[DeadlineEntry]:
+        """Deadlines already passed"""
+        return self.between(None, now or current_time().now)
+
+    def members_due_within(self, days: int, now: Optional[datetime] = None) -> Set[int]:
+        """Roster positions of members with at least one deadline due within the window (overdue included)"""
+        return {entry[1] for entry in self._due_slice(days, now, True)}
+
+    def tasks_due_within(self, days: int, now: Optional[datetime] = None) -> List[Tuple[TeamMember, List[str]]]:
+        """Due tasks grouped per member, in roster order"""
+        grouped: Dict[int, List[str]] = {}
+        for _, position, task, _ in self._due_slice(days, now, True):
+            grouped.setdefault(position, []).append(task)
+        return [(self.team_members[position], grouped[position]) for position in sorted(grouped)]
+
+    def _due_slice(self, days: int, now: Optional[datetime], include_overdue: bool) -> list:
+        now = now or current_time().now
+        # timedelta.days floors, so days <= N holds exactly for deadlines before now + N + 1 days
+        low = 0 if include_overdue else bisect_left(self._times, now.timestamp())
+        high = bisect_left(self._times, (now + timedelta(days=days + 1)).timestamp())
+        return self._entries[low:high]
+
+    def next_deadline(self, position: int) -> Optional[datetime]:
+        """Earliest deadline of the member at a roster position"""
+        return self._next.get(position)
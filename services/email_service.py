@@ -1,14 +1,20 @@
+import asyncio
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from models.schemas import EmailTemplate, ProgressReport, TeamMember
+from services.metrics import timed, current_trace_id
+from services.report_renderer import renderer
+from services.time_context import current_time
 
 class EmailService:
     def __init__(self):
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587
+        self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
+        self.use_tls = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
         self.username = os.getenv('EMAIL_USERNAME')
         self.password = os.getenv('EMAIL_PASSWORD')
     
@@ -17,9 +23,9 @@ class EmailService:
         template = self._create_progress_check_template(team_member)
         await self._send_email(template)
     
-    async def send_report(self, report: ProgressReport):
+    async def send_report(self, report: ProgressReport, recipient: Optional[str] = None):
         """Send the progress report to the manager"""
-        template = self._create_report_template(report)
+        template = self._create_report_template(report, recipient)
         await self._send_email(template)
     
     def _create_progress_check_template(self, team_member: TeamMember) -> EmailTemplate:
@@ -45,53 +51,42 @@ class EmailService:
             recipient=team_member.email
         )
     
-    def _create_report_template(self, report: ProgressReport) -> EmailTemplate:
+    def _create_report_template(self, report: ProgressReport, recipient: Optional[str] = None) -> EmailTemplate:
         """Create a progress report email template"""
         subject = f"Daily Team Progress Report - {report.date.strftime('%Y-%m-%d')}"
         
-        body = f"""
-        Team Progress Report
-        
-        Overall Progress: {report.overall_progress}%
-        
-        Summary:
-        {report.summary}
-        
-        Team Member Updates:
-        {self._format_team_updates(report.team_members)}
-        
-        Blockers:
-        {self._format_list(report.blockers)}
-        
-        Recommendations:
-        {self._format_list(report.recommendations)}
-        
-        Best regards,
-        Your AI Assistant
-        """
+        body = renderer.report_email_body(report)
         
         return EmailTemplate(
             subject=subject,
             body=body,
-            recipient=os.getenv('MANAGER_EMAIL')
+            recipient=recipient or os.getenv('MANAGER_EMAIL')
         )
     
     async def _send_email(self, template: EmailTemplate):
         """Send an email using the provided template"""
+        await asyncio.to_thread(self._deliver, template)
+    
+    def _deliver(self, template: EmailTemplate):
+        """Build and deliver the message over SMTP (blocking, run off the event loop)"""
         try:
             msg = MIMEMultipart()
             msg['From'] = self.username
             msg['To'] = template.recipient
             msg['Subject'] = template.subject
+            if current_trace_id():
+                msg['X-Trace-Id'] = current_trace_id()
             
             if template.cc:
                 msg['Cc'] = ', '.join(template.cc)
             
             msg.attach(MIMEText(template.body, 'plain'))
             
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
+            with timed("smtp_send"), smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+                if self.use_tls:
+                    server.starttls()
+                if self.username and self.password:
+                    server.login(self.username, self.password)
                 recipients = [template.recipient] + (template.cc or [])
                 server.send_message(msg, self.username, recipients)
                 
@@ -99,21 +94,17 @@ class EmailService:
             print(f"Error sending email: {str(e)}")
             raise
     
-    def _format_tasks(self, tasks: List[str], deadlines: List[str]) -> str:
+    def _format_tasks(self, tasks: List[str], deadlines: List[datetime]) -> str:
         """Format tasks and deadlines for email"""
+        clock = current_time()
         return '\n'.join([
-            f"- {task} (Deadline: {deadline})"
+            f"- {task} (Deadline: {clock.date(deadline)})"
             for task, deadline in zip(tasks, deadlines)
         ])
     
     def _format_team_updates(self, team_members: List[TeamMember]) -> str:
         """Format team member updates for email"""
-        return '\n\n'.join([
-            f"{member.name} ({member.role}):\n"
-            f"Progress: {member.progress}%\n"
-            f"Tasks: {', '.join(member.tasks)}"
-            for member in team_members
-        ])
+        return renderer.team_updates_text(team_members)
     
     def _format_list(self, items: List[str]) -> str:
         """Format a list of items for email"""
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from services.metrics import timed, trace_id_var, EVENT_QUEUE_DELAY, EVENT_QUEUE_DEPTH
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class EventQueueFull(Exception):
+    pass
+
+class EventDispatcher:
+    """Runs Slack event handlers on worker tasks so the HTTP ack never waits for them"""
+
+    def __init__(self, handler: EventHandler, worker_count: Optional[int] = None, max_queue: Optional[int] = None):
+        self.handler = handler
+        self.worker_count = worker_count or int(os.getenv('SLACK_EVENT_WORKERS', '8'))
+        self.max_queue = max_queue or int(os.getenv('SLACK_EVENT_QUEUE_SIZE', '1000'))
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Slack redelivers events it considers unacked; remember recent ids to drop the repeats
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._seen_limit = 10000
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        """Start the worker tasks if they are not already running"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.worker_count)
+        ]
+
+    async def stop(self):
+        """Cancel the worker tasks"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self):
+        """Wait until every queued event has been handled"""
+        if self._queue:
+            await self._queue.join()
+
+    async def dispatch(self, event: Dict[str, Any], event_id: Optional[str] = None) -> bool:
+        """Queue an event for handling; returns False for a redelivered event"""
+        if event_id:
+            if event_id in self._seen:
+                return False
+            self._seen[event_id] = None
+            if len(self._seen) > self._seen_limit:
+                self._seen.popitem(last=False)
+
+        await self.start()
+        try:
+            self._queue.put_nowait((event, trace_id_var.get(), time.perf_counter()))
+        except asyncio.QueueFull:
+            if event_id:
+                # Let Slack's retry through once there is room again
+                self._seen.pop(event_id, None)
+            raise EventQueueFull(f"Slack event queue is full ({self.max_queue} events)")
+        EVENT_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    async def _worker(self):
+        """Pull events off the queue and run the handler"""
+        while True:
+            event, trace_id, queued_at = await self._queue.get()
+            EVENT_QUEUE_DELAY.observe(time.perf_counter() - queued_at)
+            EVENT_QUEUE_DEPTH.set(self._queue.qsize())
+            trace_id_var.set(trace_id)
+            try:
+                with timed("event_handle"):
+                    await self.handler(event)
+            except Exception as e:
+                print(f"Error handling Slack event: {str(e)}")
+            finally:
+                self._queue.task_done()
@@ -1,8 +1,19 @@
 import google.generativeai as genai
-from typing import Dict, Any
+from typing import Any, AsyncContextManager, Callable, List, Mapping, Optional, Union
+from contextlib import nullcontext
+import asyncio
 import os
 from datetime import datetime
 from langchain_google_genai import ChatGoogleGenerativeAI
+from services.metrics import timed, is_rate_limit_error, RATE_LIMITED, RETRIES
+from services.prompt_builder import PromptBuilder
+from services.response_cache import ResponseCache
+from models.roster import MemberMapping, MEMBER_KEYS
+from models.schemas import TeamMember
+from langchain_core.messages import BaseMessage
+
+# Member fields rendered in the member block rather than as history
+MEMBER_FIELDS = set(MEMBER_KEYS)
 
 class GeminiService:
     def __init__(self, api_key: str = None):
@@ -15,80 +26,93 @@ class GeminiService:
             model="gemini-1.5-flash",
             verbose=True,
             temperature=0.5,
-            google_api_key=self.api_key
+            google_api_key=self.api_key,
+            # Gemini has no system role here; the shared instructions are sent as a leading user turn
+            convert_system_message_to_human=True
         )
+        self.prompt_builder = PromptBuilder()
+        self.max_retries = int(os.getenv('LLM_MAX_RETRIES', '2'))
+        self.retry_backoff = float(os.getenv('LLM_RETRY_BACKOFF_SECONDS', '1'))
+        self.response_cache = ResponseCache()
 
-    def generate_email(self, member_data: Dict[str, Any]) -> str:
+    def generate_email(self, member_data: Union[TeamMember, Mapping[str, Any]]) -> str:
         """
         Generate a personalized email for a team member using their data and historical progress.
         
         Args:
-            member_data: Current member's data from spreadsheet
-            historical_data: Optional historical data for the member
+            member_data: A roster member, or a dict of sheet values plus dated history entries
         """
         # Prepare the prompt for Gemini
-        prompt = self._create_prompt(member_data)
+        with timed("prompt_build"):
+            prompt = self._create_prompt(member_data)
         
         # Generate response from Gemini
-        response = self.llm.invoke(prompt)
+        try:
+            with timed("gemini_call"):
+                response = self.llm.invoke(prompt)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                RATE_LIMITED.inc(service="gemini")
+            raise
         
         return response.content
 
-    def _create_prompt(self, member_data: Dict[str, Any]) -> str:
-        """Create a detailed prompt for Gemini based on member data."""
-        # Handle deadlines as a list
-        deadlines = member_data.get('deadlines', [])
-        # Convert deadlines to string if they are datetime objects
-        formatted_deadlines = []
-        days_until_deadline = []
-        current_date = datetime.now()
-        for deadline in deadlines:
-            if isinstance(deadline, datetime):
-                formatted_deadlines.append(deadline.strftime('%Y-%m-%d'))
-                days = (deadline - current_date).days
-            else:
-                formatted_deadlines.append(str(deadline))
-                try:
-                    deadline_date = datetime.strptime(str(deadline), '%Y-%m-%d')
-                    days = (deadline_date - current_date).days
-                except:
-                    days = 'Unknown'
-            days_until_deadline.append(f"{days} days")
+    async def ainvoke(self, prompt: Any, slot: Optional[Callable[[], AsyncContextManager]] = None) -> str:
+        """Invoke the LLM inside a concurrency slot, retrying calls rejected by quota."""
+        cache_key = self.response_cache.key(prompt) if self.response_cache.enabled else None
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with (slot() if slot else nullcontext()):
+                    with timed("gemini_call"):
+                        response = await self.llm.ainvoke(prompt)
+                if cache_key:
+                    self.response_cache.set(cache_key, response.content)
+                return response.content
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                RATE_LIMITED.inc(service="gemini")
+                if attempt == self.max_retries:
+                    raise
+                RETRIES.inc(operation="gemini_call")
+                # The slot is released before sleeping so the limiter can shrink around us
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
 
-        # Handle tasks as a list
+    def _create_prompt(self, member_data: Union[TeamMember, Mapping[str, Any]]) -> List[BaseMessage]:
+        """Create a compact prompt for Gemini based on member data."""
+        if isinstance(member_data, TeamMember):
+            # Read the roster record in place; its lists are already parsed
+            member_data = MemberMapping(member_data)
         tasks = member_data.get('tasks', [])
-        formatted_tasks = ', '.join(tasks) if isinstance(tasks, list) else str(tasks)
-
-        # Create the prompt
-        prompt = f"""As a project manager, write a personalized email to {member_data.get('email', 'the team member')} regarding their work progress.
-        
-Current Status:
-- Role: {member_data.get('role', 'N/A')}
-- Tasks: {formatted_tasks}
-- Deadlines: {', '.join(formatted_deadlines)} ({', '.join(map(str, days_until_deadline))})
-- Current Progress: {member_data.get('progress', 'N/A')}
-
-Historical Context:
-{self._format_historical_data(member_data) if member_data else 'No historical data available'}
-
-Please write a professional but friendly email that:
-1. Acknowledges their current progress
-2. Shows understanding of their role and tasks
-3. Asks for specific updates on their progress
-4. Offers support if needed
-5. Maintains a motivating tone
-6. References their deadlines and progress appropriately
+        if not isinstance(tasks, list):
+            tasks = [task.strip() for task in str(tasks).split(',')]
+        deadlines = member_data.get('deadlines', [])
+        if not isinstance(deadlines, list):
+            deadlines = [deadline.strip() for deadline in str(deadlines).split(',')]
 
-The email should be personalized based on their role, progress, and time until deadlines.
-"""
-        return prompt
+        return self.prompt_builder.build_messages(
+            name=member_data.get('name') or member_data.get('email', 'the team member'),
+            role=member_data.get('role', 'N/A'),
+            tasks=tasks,
+            deadlines=deadlines,
+            progress=member_data.get('progress', 'N/A'),
+            history=self._format_historical_data(member_data)
+        )
 
-    def _format_historical_data(self, member_data: Dict[str, Any]) -> str:
-        """Format historical data for the prompt."""
-        if not member_data:
-            return "No historical data available"
+    def _format_historical_data(self, member_data: Mapping[str, Any]) -> Optional[str]:
+        """Format historical data for the prompt, skipping fields already in the member block."""
+        history = {
+            key: value for key, value in member_data.items()
+            if key not in MEMBER_FIELDS
+        }
+        if not history:
+            return None
         
         formatted_data = "Previous Progress:\n"
-        for date, progress in member_data.items():
+        for date, progress in history.items():
             formatted_data += f"- {date}: {progress}\n"
-        return formatted_data 
\ No newline at end of file
+        return formatted_data
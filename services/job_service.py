@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from models.schemas import Job, JobStage
+from services.metrics import current_trace_id, trace_id_var
+from services.state_backend import StateBackend
+
+JobHandler = Callable[["JobContext", Dict[str, Any]], Awaitable[Any]]
+
+class JobContext:
+    """Handle passed to job handlers for recording per-stage timings"""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """Record the wall time spent in a named stage of the job"""
+        stage = JobStage(name=name, started_at=datetime.now())
+        self.job.stages.append(stage)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.finished_at = datetime.now()
+            stage.duration_ms = (time.perf_counter() - start) * 1000
+
+class JobService:
+    """In-process job queue executing report work outside the request cycle"""
+
+    def __init__(self, worker_count: Optional[int] = None, state: Optional[StateBackend] = None):
+        self.worker_count = worker_count or int(os.getenv('REPORT_JOB_WORKERS', '4'))
+        self.max_stored_jobs = int(os.getenv('REPORT_JOB_MAX_STORED', '1000'))
+        # With a state backend, job records and dedup claims are shared, so any worker can answer
+        # /api/jobs/{id} and identical requests on different workers share one job
+        self.state = state
+        # How long finished job records stay readable from other workers
+        self.record_ttl = float(os.getenv('REPORT_JOB_TTL_SECONDS', '86400'))
+        # A shared claim outlives a worker that died mid-job by at most this long
+        self.claim_ttl = float(os.getenv('REPORT_JOB_CLAIM_SECONDS', '900'))
+        self.jobs: Dict[str, Job] = {}
+        self._handlers: Dict[str, JobHandler] = {}
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._dedup: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that executes jobs of the given kind"""
+        self._handlers[kind] = handler
+
+    async def start(self):
+        """Start the worker tasks if they are not already running"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(i))
+            for i in range(self.worker_count)
+        ]
+
+    async def stop(self):
+        """Cancel the worker tasks"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, kind: str, payload: Optional[Dict[str, Any]] = None) -> Job:
+        """Queue a job, returning an existing one when identical inputs are already queued or running"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        payload = payload or {}
+        dedup_key = self._dedup_key(kind, payload)
+
+        existing = self._find_duplicate(dedup_key)
+        if existing:
+            return existing
+
+        job_id = uuid.uuid4().hex
+        if self.state:
+            # The lease is the atomic claim; the losing worker hands back the winner's job
+            claimed = await asyncio.to_thread(self.state.acquire_lease, f"job_claim:{dedup_key}", job_id, self.claim_ttl)
+            if not claimed:
+                shared = await self._find_shared_duplicate(dedup_key)
+                if shared:
+                    return shared
+
+        await self.start()
+        job = Job(
+            id=job_id,
+            kind=kind,
+            status="queued",
+            created_at=datetime.now(),
+            dedup_key=dedup_key,
+            trace_id=current_trace_id()
+        )
+        self.jobs[job.id] = job
+        self._payloads[job.id] = payload
+        self._dedup[dedup_key] = job.id
+        self._evict()
+        await self._publish(job)
+        await self._queue.put(job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job run by this worker"""
+        return self.jobs.get(job_id)
+
+    async def get_json(self, job_id: str) -> Optional[str]:
+        """A job's JSON, from this worker or the shared state"""
+        job = self.jobs.get(job_id)
+        if job:
+            return job.model_dump_json()
+        if not self.state:
+            return None
+        return await asyncio.to_thread(self.state.get, f"job:{job_id}")
+
+    async def _publish(self, job: Job):
+        """Store the job record in the shared state, and hold its dedup entry while it is pending"""
+        if not self.state:
+            return
+        record = job.model_dump_json()
+        pending = job.status in ("queued", "running")
+
+        def write():
+            self.state.set(f"job:{job.id}", record, ttl=self.record_ttl)
+            if pending:
+                self.state.set(f"job_dedup:{job.dedup_key}", job.id, ttl=self.claim_ttl)
+            else:
+                self.state.delete(f"job_dedup:{job.dedup_key}")
+                self.state.release_lease(f"job_claim:{job.dedup_key}", job.id)
+
+        try:
+            await asyncio.to_thread(write)
+        except Exception as e:
+            # The job still runs and is readable here; only other workers miss it
+            print(f"Error publishing job {job.id}: {str(e)}")
+
+    async def _find_shared_duplicate(self, dedup_key: str) -> Optional[Job]:
+        """A queued or running job with the same inputs on another worker"""
+        def read() -> Optional[str]:
+            job_id = self.state.get(f"job_dedup:{dedup_key}")
+            return self.state.get(f"job:{job_id}") if job_id else None
+
+        record = await asyncio.to_thread(read)
+        if not record:
+            return None
+        job = Job.model_validate_json(record)
+        return job if job.status in ("queued", "running") else None
+
+    def _dedup_key(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Hash the job kind and its canonical payload"""
+        canonical = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(f"{kind}:{canonical}".encode()).hexdigest()
+
+    def _find_duplicate(self, dedup_key: str) -> Optional[Job]:
+        """Find a job with the same inputs that is still queued or running"""
+        # A finished job is never reused: the payload names the tenant, not the roster it read,
+        # so a new request after a sheet edit must run against the current data
+        job = self.jobs.get(self._dedup.get(dedup_key, ""))
+        if job and job.status in ("queued", "running"):
+            return job
+        return None
+
+    def _evict(self):
+        """Drop the oldest finished jobs once the store is over capacity"""
+        overflow = len(self.jobs) - self.max_stored_jobs
+        if overflow <= 0:
+            return
+        finished = [
+            job for job in self.jobs.values()
+            if job.status in ("succeeded", "failed")
+        ]
+        finished.sort(key=lambda job: job.created_at)
+        for job in finished[:overflow]:
+            del self.jobs[job.id]
+            self._payloads.pop(job.id, None)
+            if self._dedup.get(job.dedup_key) == job.id:
+                del self._dedup[job.dedup_key]
+
+    async def _worker(self, worker_id: int):
+        """Pull job ids off the queue and execute them"""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        """Execute a single job and store its result or error"""
+        job = self.jobs.get(job_id)
+        if not job:
+            return
+        payload = self._payloads.pop(job_id, {})
+        job.status = "running"
+        job.started_at = datetime.now()
+        await self._publish(job)
+        # Workers outlive requests, so carry the submitter's trace id over explicitly
+        trace_id_var.set(job.trace_id)
+        try:
+            job.result = await self._handlers[job.kind](JobContext(job), payload)
+            job.status = "succeeded"
+        except Exception as e:
+            print(f"Error in job {job.id} ({job.kind}): {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now()
+            await self._publish(job)
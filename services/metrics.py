@@ -0,0 +1,244 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Trace id of the Slack event or HTTP request being handled; copied into tasks and threads it spawns
+trace_id_var: ContextVar[Optional[str]] = ContextVar('trace_id', default=None)
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+def current_trace_id() -> Optional[str]:
+    return trace_id_var.get()
+
+def trace_log(level: str, message: str):
+    """Print a log line tagged with the current trace id"""
+    print(f"{level}: [trace={current_trace_id() or '-'}] {message}")
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        ...
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in list(self._values.items())
+        ]
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in list(self._values.items())
+        ]
+
+class Histogram(_Metric):
+    type_name = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [non-cumulative bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, counts in list(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {self._sums[key]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text exposition format"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4"
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+STAGE_LATENCY = registry.histogram(
+    "slack_team_stage_latency_seconds", "Latency of hot-path stages", ["stage"]
+)
+STAGE_IN_FLIGHT = registry.gauge(
+    "slack_team_stage_in_flight", "Hot-path stages currently executing", ["stage"]
+)
+STAGE_ERRORS = registry.counter(
+    "slack_team_stage_errors_total", "Hot-path stages that raised", ["stage"]
+)
+CACHE_REQUESTS = registry.counter(
+    "slack_team_cache_requests_total", "Cache lookups by result (hit or miss)", ["cache", "result"]
+)
+RETRIES = registry.counter(
+    "slack_team_retries_total", "Operations retried after a failure", ["operation"]
+)
+RATE_LIMITED = registry.counter(
+    "slack_team_rate_limited_total", "Calls rejected by a rate limit (HTTP 429 / RESOURCE_EXHAUSTED)", ["service"]
+)
+EVENT_QUEUE_DELAY = registry.histogram(
+    "slack_team_event_queue_delay_seconds", "Time Slack events wait between ack and handling"
+)
+EVENT_QUEUE_DEPTH = registry.gauge(
+    "slack_team_event_queue_depth", "Slack events acked but not yet handled"
+)
+PROMPT_TOKENS = registry.histogram(
+    "slack_team_prompt_tokens", "Estimated input tokens per LLM prompt",
+    buckets=(100, 200, 400, 800, 1600, 3200, 6400, 12800)
+)
+LLM_CONCURRENCY_LIMIT = registry.gauge(
+    "slack_team_llm_concurrency_limit", "Current adaptive limit on concurrent LLM calls"
+)
+LLM_IN_FLIGHT = registry.gauge(
+    "slack_team_llm_in_flight", "LLM calls currently executing"
+)
+LLM_QUEUE_DEPTH = registry.gauge(
+    "slack_team_llm_queue_depth", "LLM calls waiting for a concurrency slot"
+)
+COALESCED_REQUESTS = registry.counter(
+    "slack_team_coalesced_requests_total", "Requests served by joining an identical in-flight computation", ["operation"]
+)
+EVENT_LOOP_LAG = registry.histogram(
+    "slack_team_event_loop_lag_seconds", "How late the event loop ran a scheduled wakeup",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+EVENT_LOOP_BLOCKED = registry.counter(
+    "slack_team_event_loop_blocked_total", "Times the event loop was blocked past the lag threshold"
+)
+CREW_TASK_SECONDS = registry.histogram(
+    "slack_team_crew_task_seconds", "Duration of each task in a monitoring crew run", ["agent"],
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+CREW_TASK_PEAK_BYTES = registry.gauge(
+    "slack_team_crew_task_peak_bytes", "Peak traced allocation during the last run of each crew task", ["agent"]
+)
+
+@contextmanager
+def timed(stage: str):
+    """Record latency, in-flight count and errors for a stage; usable from sync and async code"""
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an error is a 429 / quota rejection from Slack, Google or Gemini"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(getattr(error, 'resp', None), 'status', None)
+    if status == 429 or str(status) == '429':
+        return True
+    text = str(error)
+    return 'RESOURCE_EXHAUSTED' in text or 'ratelimited' in text
@@ -0,0 +1,121 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Optional
+from services.metrics import EVENT_LOOP_LAG, EVENT_LOOP_BLOCKED
+
+class ProfilerBusy(Exception):
+    pass
+
+def _collapse(frame) -> str:
+    """One stack in the collapsed (flame graph) format, outermost frame first"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval for a bounded time; stdlib only, no tracing overhead"""
+
+    def __init__(self, max_seconds: Optional[float] = None):
+        self.max_seconds = max_seconds or float(os.getenv('PROFILE_MAX_SECONDS', '60'))
+        self._lock = threading.Lock()
+
+    def profile(self, seconds: float, interval: float = 0.005) -> str:
+        """Sample for up to max_seconds and return collapsed stacks with sample counts (blocking)"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            seconds = max(0.0, min(seconds, self.max_seconds))
+            interval = max(interval, 0.001)
+            me = threading.get_ident()
+            names = {}
+            samples = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    if ident not in names:
+                        names.update({thread.ident: thread.name for thread in threading.enumerate()})
+                    samples[f"{names.get(ident, ident)};{_collapse(frame)}"] += 1
+                time.sleep(interval)
+            return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+        finally:
+            self._lock.release()
+
+def dump_tasks() -> str:
+    """Stack of every unfinished asyncio task on the running loop"""
+    out = io.StringIO()
+    tasks = sorted(asyncio.all_tasks(), key=lambda task: task.get_name())
+    out.write(f"{len(tasks)} tasks\n\n")
+    for task in tasks:
+        task.print_stack(file=out)
+        out.write("\n")
+    return out.getvalue()
+
+class LoopLagMonitor:
+    """Measures event loop lag and logs the loop thread's stack whenever something blocks it past a threshold"""
+
+    def __init__(self, threshold: Optional[float] = None, interval: Optional[float] = None):
+        self.threshold = threshold if threshold is not None else float(os.getenv('LOOP_LAG_THRESHOLD_SECONDS', '0'))
+        self.interval = interval or float(os.getenv('LOOP_LAG_INTERVAL_SECONDS', '0.05'))
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    async def start(self):
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        if not self.enabled or self._task:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._watchdog.join(timeout=1)
+        self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            EVENT_LOOP_LAG.observe(max(0.0, now - expected))
+            self._beat = now
+
+    def _watch(self):
+        """Runs in its own thread, so it can still look at the loop while the loop is stuck"""
+        reported = None
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or reported == beat:
+                continue
+            # Once per stall: the stack shows the call that is holding the loop right now
+            reported = beat
+            EVENT_LOOP_BLOCKED.inc()
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame else "  (no frame)\n"
+            print(f"WARNING: event loop blocked for {blocked:.3f}s so far; loop thread stack:\n{stack}", end="")
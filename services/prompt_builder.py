@@ -0,0 +1,90 @@
+import os
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from services.metrics import PROMPT_TOKENS
+from services.time_context import TimeContext, current_time
+
+# Static instructions shared by every member's prompt; only the member block below varies
+SYSTEM_PROMPT = """You are a project manager writing a personalized email to a team member about their work progress.
+
+Write a professional but friendly email that:
+1. Acknowledges their current progress
+2. Shows understanding of their role and tasks
+3. Asks for specific updates on their progress
+4. Offers support if needed
+5. Maintains a motivating tone
+6. References their deadlines and progress appropriately
+
+Personalize the email based on their role, progress, and time until deadlines."""
+
+MAX_TASK_CHARS = 120
+# Room kept for the "...and N more tasks" line when a list is cut
+SUMMARY_RESERVE_TOKENS = 20
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+class PromptBuilder:
+    """Builds compact email prompts within a per-member token budget"""
+
+    def __init__(self, member_token_budget: Optional[int] = None):
+        self.member_token_budget = member_token_budget or int(os.getenv('PROMPT_MEMBER_TOKEN_BUDGET', '300'))
+        self.system_message = SystemMessage(content=SYSTEM_PROMPT)
+
+    def build_messages(self, name: str, role: str, tasks: Sequence[str], deadlines: Sequence[Any],
+                       progress: Any, history: Optional[str] = None, now: Optional[datetime] = None) -> List[BaseMessage]:
+        """Build the shared system message plus a budgeted member message"""
+        member_block = self.member_block(name, role, tasks, deadlines, progress, history, now)
+        PROMPT_TOKENS.observe(estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(member_block))
+        return [self.system_message, HumanMessage(content=member_block)]
+
+    def member_block(self, name: str, role: str, tasks: Sequence[str], deadlines: Sequence[Any],
+                     progress: Any, history: Optional[str] = None, now: Optional[datetime] = None) -> str:
+        """Describe one member, keeping the most urgent tasks that fit the budget"""
+        clock = current_time(now)
+        header = f"Team member: {name}\nRole: {role}\nCurrent progress: {progress}%\nTasks by deadline:\n"
+        budget = self.member_token_budget - estimate_tokens(header)
+
+        lines = []
+        ordered = self._order_by_deadline(tasks, deadlines, clock)
+        for index, (task, deadline) in enumerate(ordered):
+            line = self._task_line(task, deadline, clock)
+            reserve = SUMMARY_RESERVE_TOKENS if index < len(ordered) - 1 else 0
+            if lines and estimate_tokens(line) + reserve > budget:
+                lines.append(self._summary_line(ordered[index:], clock))
+                break
+            lines.append(line)
+            budget -= estimate_tokens(line)
+
+        block = header + "\n".join(lines)
+        if history and budget > 0:
+            block += "\nHistory:\n" + history[:budget * 4]
+        return block
+
+    def _order_by_deadline(self, tasks: Sequence[str], deadlines: Sequence[Any],
+                           clock: TimeContext) -> List[Tuple[str, Optional[datetime]]]:
+        """Pair tasks with deadlines, nearest (or most overdue) first and undated last"""
+        paired = [
+            (task, clock.parse(deadlines[i]) if i < len(deadlines) else None)
+            for i, task in enumerate(tasks)
+        ]
+        return sorted(paired, key=lambda pair: (pair[1] is None, pair[1] or datetime.max))
+
+    def _task_line(self, task: str, deadline: Optional[datetime], clock: TimeContext) -> str:
+        task = task if len(task) <= MAX_TASK_CHARS else task[:MAX_TASK_CHARS - 3] + "..."
+        if deadline is None:
+            return f"- {task} (no deadline)"
+        days = clock.days_until(deadline)
+        when = f"{-days} days overdue" if days < 0 else f"{days} days left"
+        return f"- {task} (due {clock.date(deadline)}, {when})"
+
+    def _summary_line(self, rest: Sequence[Tuple[str, Optional[datetime]]], clock: TimeContext) -> str:
+        dated = [deadline for _, deadline in rest if deadline]
+        if not dated:
+            return f"- ...and {len(rest)} more tasks"
+        return (
+            f"- ...and {len(rest)} more tasks due "
+            f"{clock.date(min(dated))} to {clock.date(max(dated))}"
+        )
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+from models.schemas import TeamMember
+from services.deadline_index import DeadlineIndex
+from services.time_context import current_time
+from services.email_service import EmailService
+from services.slack_service import SlackService
+
+class RateLimiter:
+    """Async token bucket spacing out calls to a rate-limited API"""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Wait until a call is allowed"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class ReminderPlan:
+    """Who gets reminded about what, computed once against a single 'now'"""
+
+    def __init__(self, now: datetime, deadline_reminders: List[Tuple[TeamMember, List[str]]],
+                 idle_members: List[TeamMember]):
+        self.now = now
+        self.deadline_reminders = deadline_reminders
+        self.idle_members = idle_members
+
+class ReminderFanout:
+    """Sends reminders concurrently within Slack and SMTP limits, or as a single digest"""
+
+    def __init__(self, slack_service: SlackService, email_service: EmailService):
+        self.slack_service = slack_service
+        self.email_service = email_service
+        self.window_days = int(os.getenv('REMINDER_WINDOW_DAYS', '2'))
+        self.digest = os.getenv('REMINDER_DIGEST', 'false').lower() == 'true'
+        # chat.postMessage allows roughly one message per second per channel
+        self.slack_rate = RateLimiter(float(os.getenv('SLACK_POSTS_PER_SECOND', '1')))
+        self.email_concurrency = int(os.getenv('SMTP_CONCURRENCY', '4'))
+
+    def plan(self, team_members: List[TeamMember], now: Optional[datetime] = None,
+             deadline_index: Optional[DeadlineIndex] = None) -> ReminderPlan:
+        """Find tasks due within the window and members with no progress"""
+        now = now or current_time().now
+        deadline_index = DeadlineIndex.for_roster(team_members, deadline_index)
+        deadline_reminders = deadline_index.tasks_due_within(self.window_days, now)
+        idle_members = [member for member in team_members if member.progress == 0.0]
+        return ReminderPlan(now, deadline_reminders, idle_members)
+
+    async def send_reminders(self, reminders: List[Tuple[str, List[str]]], digest: Optional[bool] = None,
+                             title: str = "Task reminders"):
+        """Send one Slack reminder per member, or a single threaded digest"""
+        if not reminders:
+            return
+        if self.digest if digest is None else digest:
+            await self.slack_service.send_reminder_digest(reminders, title)
+            return
+
+        async def send_one(name: str, tasks: List[str]):
+            await self.slack_rate.wait()
+            await self.slack_service.send_reminder(name, tasks)
+
+        results = await asyncio.gather(
+            *[send_one(name, tasks) for name, tasks in reminders],
+            return_exceptions=True
+        )
+        self._log_failures("Slack reminder", [name for name, _ in reminders], results)
+
+    async def send_progress_checks(self, team_members: List[TeamMember]):
+        """Email every member a progress check, a few SMTP sessions at a time"""
+        semaphore = asyncio.Semaphore(self.email_concurrency)
+
+        async def send_one(member: TeamMember):
+            async with semaphore:
+                await self.email_service.send_progress_check(member)
+
+        results = await asyncio.gather(
+            *[send_one(member) for member in team_members],
+            return_exceptions=True
+        )
+        self._log_failures("progress check email", [member.email for member in team_members], results)
+
+    def _log_failures(self, kind: str, recipients: List[str], results: List):
+        for recipient, result in zip(recipients, results):
+            if isinstance(result, Exception):
+                print(f"Error sending {kind} to {recipient}: {str(result)}")
@@ -0,0 +1,341 @@
+import asyncio
+import email
+import imaplib
+import mailbox
+import os
+import re
+import time
+from datetime import datetime, timezone
+from email.message import Message
+from email.utils import parseaddr, parsedate_to_datetime
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, Callable, Dict, List, Optional, Tuple
+from langchain_core.messages import HumanMessage
+from models.schemas import TeamMember
+from services.slack_service import SlackService
+from services.state_backend import StateBackend
+
+# Only an explicit percentage counts; a bare number ("progress on 3 tasks", "2 of 5 done") goes to the LLM
+PERCENT_PATTERN = re.compile(r'(?<![\d.])(\d{1,3}(?:\.\d+)?)\s*(?:%|percent\b|/\s*100\b)', re.IGNORECASE)
+# Replies worth an LLM call when no percentage is stated outright
+UPDATE_HINT_PATTERN = re.compile(r'\d|\b(?:progress|done|finished|complete[d]?|halfway|half|started|almost)\b', re.IGNORECASE)
+QUOTE_START_PATTERN = re.compile(r'^(?:On .+ wrote:|-+\s*Original Message\s*-+|From: .+)$')
+
+# _ask_llm's answer when the call itself failed, as opposed to the reply stating no progress
+LLM_FAILED = object()
+
+EXTRACTION_PROMPT = """A team member replied to a request for a progress update. Reply with only their overall completion percentage as a number from 0 to 100, or NONE if the message does not say.
+
+Message:
+{text}"""
+
+class Reply:
+    """One progress reply, from email or a Slack thread"""
+
+    def __init__(self, source: str, sender: str, text: str, received_at: datetime, ref: str):
+        self.source = source
+        self.sender = sender.lower()  # Email address of the member
+        self.text = text
+        self.received_at = received_at
+        self.ref = ref  # Source-specific id used to acknowledge the reply
+
+def strip_quoted(text: str) -> str:
+    """Drop the quoted original message below a reply"""
+    lines = []
+    for line in text.splitlines():
+        if QUOTE_START_PATTERN.match(line.strip()):
+            break
+        if not line.lstrip().startswith('>'):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+def parse_progress(text: str) -> Optional[float]:
+    """The one progress figure a reply states, or None when it states none or several that disagree"""
+    values = {float(match) for match in PERCENT_PATTERN.findall(text)}
+    values = {value for value in values if 0 <= value <= 100}
+    return values.pop() if len(values) == 1 else None
+
+def _message_text(message: Message) -> str:
+    part = message
+    if message.is_multipart():
+        part = next((p for p in message.walk() if p.get_content_type() == 'text/plain'), None)
+        if part is None:
+            return ""
+    payload = part.get_payload(decode=True) or b""
+    return payload.decode(part.get_content_charset() or 'utf-8', errors='replace')
+
+def _message_date(message: Message) -> datetime:
+    try:
+        return parsedate_to_datetime(message['Date']).astimezone(timezone.utc)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
+
+def _email_reply(source: str, message: Message, ref: str) -> Optional[Reply]:
+    sender = parseaddr(message.get('From', ''))[1]
+    if not sender:
+        return None
+    return Reply(source, sender, strip_quoted(_message_text(message)), _message_date(message), ref)
+
+class MaildirSource:
+    """Replies delivered to a local Maildir; handled messages are moved to cur/ and marked seen"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.maildir = mailbox.Maildir(path, create=True)
+
+    def fetch(self) -> List[Reply]:
+        replies = []
+        for key in self.maildir.iterkeys():
+            message = self.maildir.get_message(key)
+            if 'S' in message.get_flags():
+                continue
+            reply = _email_reply("maildir", message, key)
+            if reply:
+                replies.append(reply)
+        return replies
+
+    def ack(self, replies: List[Reply]):
+        for reply in replies:
+            try:
+                message = self.maildir.get_message(reply.ref)
+            except KeyError:
+                continue
+            message.set_subdir('cur')
+            message.add_flag('S')
+            self.maildir[reply.ref] = message
+
+class ImapSource:
+    """Unseen replies in an IMAP folder; read with BODY.PEEK and flagged seen only once applied"""
+
+    def __init__(self, host: str, port: int, username: str, password: str,
+                 folder: str = 'INBOX', use_ssl: bool = True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.folder = folder
+        self.use_ssl = use_ssl
+
+    def _connect(self) -> imaplib.IMAP4:
+        conn = imaplib.IMAP4_SSL(self.host, self.port) if self.use_ssl else imaplib.IMAP4(self.host, self.port)
+        conn.login(self.username, self.password)
+        conn.select(self.folder)
+        return conn
+
+    def fetch(self) -> List[Reply]:
+        replies = []
+        conn = self._connect()
+        try:
+            _, data = conn.uid('search', None, 'UNSEEN')
+            for uid in data[0].split():
+                _, parts = conn.uid('fetch', uid, '(BODY.PEEK[])')
+                raw = next((part[1] for part in parts if isinstance(part, tuple)), None)
+                if raw is None:
+                    continue
+                reply = _email_reply("imap", email.message_from_bytes(raw), uid.decode())
+                if reply:
+                    replies.append(reply)
+        finally:
+            conn.logout()
+        return replies
+
+    def ack(self, replies: List[Reply]):
+        if not replies:
+            return
+        conn = self._connect()
+        try:
+            conn.uid('store', ",".join(reply.ref for reply in replies), '+FLAGS', '(\\Seen)')
+        finally:
+            conn.logout()
+
+class SlackThreadSource:
+    """Replies in the threads of recent reminder posts"""
+
+    # State key holding {"channel:thread_ts": ts of the newest reply handled}, so a restart never re-reads old replies
+    STATE_KEY = "reply_threads"
+
+    def __init__(self, slack_service: SlackService, state: Optional[StateBackend] = None):
+        self.slack_service = slack_service
+        self.state = state
+        self._memory: Dict[str, str] = {}  # Used when no state backend is given
+        self.max_threads = self.slack_service.reminder_threads.maxlen or 200
+        # Replies to reminders older than this are no longer polled
+        self.max_age = float(os.getenv('SLACK_REPLY_THREAD_DAYS', '7')) * 86400
+
+    def _load(self) -> Dict[str, str]:
+        return dict(self.state.get(self.STATE_KEY, {})) if self.state else dict(self._memory)
+
+    def _save(self, seen: Dict[str, str]):
+        # Keep the newest threads only, like the in-memory reminder_threads deque
+        newest = sorted(seen, key=lambda thread: float(thread.rsplit(":", 1)[1]))[-self.max_threads:]
+        seen = {thread: seen[thread] for thread in newest}
+        if self.state:
+            self.state.set(self.STATE_KEY, seen)
+        else:
+            self._memory = seen
+
+    def fetch(self) -> List[Reply]:
+        seen = self._load()
+        # Once full, threads older than everything kept were pruned on purpose; don't re-read them
+        pruned_before = min(float(thread.rsplit(":", 1)[1]) for thread in seen) if len(seen) >= self.max_threads else 0.0
+        expires_before = time.time() - self.max_age
+        cutoff = max(pruned_before, expires_before)
+        new_threads = {
+            f"{channel}:{thread_ts}": thread_ts
+            for channel, thread_ts in self.slack_service.reminder_threads
+            if f"{channel}:{thread_ts}" not in seen and float(thread_ts) > cutoff
+        }
+        expired = [thread for thread in seen if float(thread.rsplit(":", 1)[1]) <= expires_before]
+        if new_threads or expired:
+            seen.update(new_threads)
+            for thread in expired:
+                del seen[thread]
+            self._save(seen)
+        replies = []
+        for thread, oldest in seen.items():
+            channel, thread_ts = thread.split(":")
+            try:
+                replies.extend(self._thread_replies(channel, thread_ts, oldest))
+            except Exception as e:
+                # One deleted channel or failed call must not drop the other threads' replies
+                print(f"Error fetching Slack replies in {thread}: {str(e)}")
+        return replies
+
+    def _thread_replies(self, channel: str, thread_ts: str, oldest: str) -> List[Reply]:
+        replies = []
+        for message in self.slack_service.get_thread_replies(channel, thread_ts, oldest):
+            if float(message["ts"]) <= float(oldest):
+                continue
+            sender = self.slack_service.user_email(message["user"])
+            if not sender:
+                continue
+            received_at = datetime.fromtimestamp(float(message["ts"]), timezone.utc)
+            replies.append(Reply("slack", sender, message.get("text", ""), received_at,
+                                 f"{channel}:{thread_ts}:{message['ts']}"))
+        return replies
+
+    def ack(self, replies: List[Reply]):
+        if not replies:
+            return
+        seen = self._load()
+        for reply in replies:
+            channel, thread_ts, ts = reply.ref.split(":")
+            thread = f"{channel}:{thread_ts}"
+            if float(ts) > float(seen.get(thread, thread_ts)):
+                seen[thread] = ts
+        self._save(seen)
+
+class ReplyIngestion:
+    """Turns replies into progress updates: regex first, the LLM only for replies the regex cannot read"""
+
+    def __init__(self, sources: List, gemini_service=None, llm_fallback: Optional[bool] = None):
+        self.sources = sources
+        self.gemini_service = gemini_service
+        self.llm_fallback = (
+            llm_fallback if llm_fallback is not None
+            else os.getenv('REPLY_LLM_FALLBACK', 'true').lower() == 'true'
+        )
+        # Bound on LLM calls in flight when no tenant slot is given
+        self._llm_semaphore = asyncio.Semaphore(int(os.getenv('REPLY_LLM_CONCURRENCY', '2')))
+
+    @classmethod
+    def from_env(cls, slack_service: Optional[SlackService] = None, gemini_service=None,
+                 state: Optional[StateBackend] = None) -> "ReplyIngestion":
+        """Sources from REPLY_MAILDIR, IMAP_HOST and the Slack reminder threads"""
+        sources = []
+        if os.getenv('REPLY_MAILDIR'):
+            sources.append(MaildirSource(os.getenv('REPLY_MAILDIR')))
+        if os.getenv('IMAP_HOST'):
+            sources.append(ImapSource(
+                host=os.getenv('IMAP_HOST'),
+                port=int(os.getenv('IMAP_PORT', '993')),
+                username=os.getenv('IMAP_USERNAME') or os.getenv('EMAIL_USERNAME'),
+                password=os.getenv('IMAP_PASSWORD') or os.getenv('EMAIL_PASSWORD'),
+                folder=os.getenv('IMAP_FOLDER', 'INBOX'),
+                use_ssl=os.getenv('IMAP_USE_SSL', 'true').lower() == 'true'
+            ))
+        if slack_service is not None:
+            sources.append(SlackThreadSource(slack_service, state))
+        return cls(sources, gemini_service)
+
+    async def collect(self) -> List[Tuple[object, List[Reply]]]:
+        """Fetch from every source concurrently; a failing source is logged and skipped"""
+        results = await asyncio.gather(
+            *[asyncio.to_thread(source.fetch) for source in self.sources],
+            return_exceptions=True
+        )
+        collected = []
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                print(f"Error fetching replies from {type(source).__name__}: {str(result)}")
+                continue
+            collected.append((source, result))
+        return collected
+
+    async def read(self, replies: List[Reply],
+                   slot: Optional[Callable[[], AsyncContextManager]] = None) -> List[Tuple[Reply, Optional[float]]]:
+        """Progress each reply states (None if it states none); replies whose LLM call failed are left out, to be read again"""
+        parsed = [(reply, parse_progress(reply.text)) for reply in replies]
+        unresolved = [
+            reply for reply, progress in parsed
+            if progress is None and self.llm_fallback and UPDATE_HINT_PATTERN.search(reply.text)
+        ]
+        if not unresolved:
+            return parsed
+        # Each call holds a slot (e.g. TenantContext.llm_slot), so a backlog of replies waits on the
+        # shared adaptive limiter like report generation does instead of bursting into 429s
+        llm_values = await asyncio.gather(*[self._ask_llm(reply.text, slot or self._local_slot) for reply in unresolved])
+        resolved = dict(zip(map(id, unresolved), llm_values))
+        return [
+            (reply, progress if progress is not None else resolved.get(id(reply)))
+            for reply, progress in parsed
+            if resolved.get(id(reply)) is not LLM_FAILED
+        ]
+
+    async def extract(self, replies: List[Reply],
+                      slot: Optional[Callable[[], AsyncContextManager]] = None) -> Dict[str, float]:
+        """Latest stated progress per sender email"""
+        return latest_progress(await self.read(replies, slot))
+
+    @asynccontextmanager
+    async def _local_slot(self):
+        async with self._llm_semaphore:
+            yield
+
+    async def _ask_llm(self, text: str, slot: Callable[[], AsyncContextManager]):
+        """The stated progress, None if the reply states none, or LLM_FAILED"""
+        if self.gemini_service is None:
+            return None
+        try:
+            answer = await self.gemini_service.ainvoke(
+                [HumanMessage(content=EXTRACTION_PROMPT.format(text=text[:2000]))], slot
+            )
+        except Exception as e:
+            print(f"Error extracting progress with the LLM: {str(e)}")
+            return LLM_FAILED
+        match = re.search(r'\d{1,3}(?:\.\d+)?', answer or "")
+        value = float(match.group()) if match else None
+        return value if value is not None and 0 <= value <= 100 else None
+
+def latest_progress(parsed: List[Tuple[Reply, Optional[float]]]) -> Dict[str, float]:
+    """Latest stated progress per sender email"""
+    updates: Dict[str, Tuple[datetime, float]] = {}
+    for reply, progress in parsed:
+        if progress is None:
+            continue
+        current = updates.get(reply.sender)
+        if current is None or reply.received_at >= current[0]:
+            updates[reply.sender] = (reply.received_at, progress)
+    return {sender: progress for sender, (_, progress) in updates.items()}
+
+def apply_progress(team_members: List[TeamMember], progress_by_email: Dict[str, float]) -> Tuple[List[TeamMember], Dict[str, float]]:
+    """New roster with updated progress, plus the updates that actually changed something"""
+    changed = {}
+    updated = []
+    for member in team_members:
+        progress = progress_by_email.get(member.email.lower())
+        if progress is not None and progress != member.progress:
+            member = member.model_copy(update={"progress": progress})
+            changed[member.email] = progress
+        updated.append(member)
+    return updated, changed
@@ -0,0 +1,162 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+from models.schemas import ProgressReport, TeamMember
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib encoder produces the same payloads
+    orjson = None
+
+def dumps(value) -> str:
+    """Compact JSON, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+# Block Kit pieces are pre-serialized; only the escaped text is spliced in per render
+DIVIDER_BLOCK = dumps({"type": "divider"})
+_HEADER_PREFIX = '{"type":"header","text":{"type":"plain_text","text":'
+_SECTION_PREFIX = '{"type":"section","text":{"type":"mrkdwn","text":'
+
+# Bump when fragment markup changes, so fragments saved in a snapshot are discarded
+FRAGMENT_VERSION = 2
+
+EMAIL_REPORT_TEMPLATE = """
+        Team Progress Report
+
+        Overall Progress: {overall_progress}%
+
+        Summary:
+        {summary}
+
+        Team Member Updates:
+        {team_updates}
+
+        Blockers:
+        {blockers}
+
+        Recommendations:
+        {recommendations}
+
+        Best regards,
+        Your AI Assistant
+        """
+
+def header_block(text: str) -> str:
+    return _HEADER_PREFIX + dumps(text) + '}}'
+
+def section_block(text: str) -> str:
+    return _SECTION_PREFIX + dumps(text) + '}}'
+
+def blocks_array(blocks: Sequence[str]) -> str:
+    return '[' + ','.join(blocks) + ']'
+
+def _member_key(member: TeamMember) -> Tuple:
+    return ("slack", member.name, member.role, member.progress, *member.tasks)
+
+class ReportRenderer:
+    """Renders reports as serialized Block Kit (reusing cached per-member blocks) and as email text"""
+
+    def __init__(self, cache_size: int = None):
+        self.cache_size = cache_size or int(os.getenv('RENDER_CACHE_SIZE', '4096'))
+        self._fragments: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._pending: Optional[Callable[[], Optional[list]]] = None
+
+    def _fragment(self, key: Hashable, build: Callable[[], str]) -> str:
+        """LRU lookup of a rendered fragment, keyed by the content it was rendered from"""
+        if self._pending is not None:
+            self._restore_pending()
+        fragment = self._fragments.get(key)
+        if fragment is not None:
+            self._fragments.move_to_end(key)
+            return fragment
+        fragment = build()
+        self._fragments[key] = fragment
+        if len(self._fragments) > self.cache_size:
+            self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        self._fragments.clear()
+
+    def export(self) -> List[list]:
+        """Cached fragments as [key, fragment], least recently used first"""
+        if self._pending is not None:
+            self._restore_pending()
+        return [[list(key), fragment] for key, fragment in self._fragments.items()]
+
+    def attach_snapshot(self, loader: Callable[[], Optional[list]]):
+        """Restore exported fragments on first render instead of at startup"""
+        self._pending = loader
+
+    def _restore_pending(self):
+        loader, self._pending = self._pending, None
+        for key, fragment in reversed(loader() or []):
+            key = tuple(key)
+            if key not in self._fragments:
+                self._fragments[key] = fragment
+                self._fragments.move_to_end(key, last=False)
+        while len(self._fragments) > self.cache_size:
+            self._fragments.popitem(last=False)
+
+    def _member_blocks(self, member: TeamMember) -> str:
+        return self._fragment(_member_key(member), lambda: (
+            DIVIDER_BLOCK + ',' + section_block(
+                f"*{member.name}* ({member.role})\n"
+                f"Progress: {member.progress}%\n"
+                f"Tasks: {', '.join(member.tasks)}"
+            )
+        ))
+
+    def report_blocks(self, report: ProgressReport) -> str:
+        """The daily progress report as a serialized Block Kit array"""
+        blocks = [
+            header_block(f"📊 Daily Progress Report - {report.date.strftime('%Y-%m-%d')}"),
+            section_block(f"*Overall Progress:* {report.overall_progress}%"),
+            section_block(f"*Summary:*\n{report.summary}"),
+        ]
+        blocks.extend(self._member_blocks(member) for member in report.team_members)
+        if report.blockers:
+            blocks.append(DIVIDER_BLOCK)
+            blocks.append(section_block("*🚧 Blockers:*\n" + "\n".join([f"• {blocker}" for blocker in report.blockers])))
+        if report.recommendations:
+            blocks.append(DIVIDER_BLOCK)
+            blocks.append(section_block("*💡 Recommendations:*\n" + "\n".join([f"• {rec}" for rec in report.recommendations])))
+        return blocks_array(blocks)
+
+    def email_digest_blocks(self, formatted_emails: List[tuple]) -> str:
+        """The per-member email drafts posted by the report command, as a serialized Block Kit array"""
+        blocks = [header_block("📊 Team Progress Report"), DIVIDER_BLOCK]
+        # Drafts are regenerated per request, so caching them would only evict member blocks
+        blocks.extend(section_block(f"*{email}*\n{content}") for email, content in formatted_emails)
+        blocks.append(DIVIDER_BLOCK)
+        blocks.append(section_block(f"📈 *Total Team Members*: {len(formatted_emails)}"))
+        return blocks_array(blocks)
+
+    def team_updates_text(self, team_members: List[TeamMember]) -> str:
+        """Plain-text member updates for email"""
+        # Plain f-strings are cheaper than a cache lookup here, so these are not memoized
+        return '\n\n'.join([
+            f"{member.name} ({member.role}):\n"
+            f"Progress: {member.progress}%\n"
+            f"Tasks: {', '.join(member.tasks)}"
+            for member in team_members
+        ])
+
+    def report_email_body(self, report: ProgressReport) -> str:
+        """Plain-text body of the manager report email"""
+        return EMAIL_REPORT_TEMPLATE.format(
+            overall_progress=report.overall_progress,
+            summary=report.summary,
+            team_updates=self.team_updates_text(report.team_members),
+            blockers=_format_list(report.blockers),
+            recommendations=_format_list(report.recommendations)
+        )
+
+def _format_list(items: List[str]) -> str:
+    return '\n'.join([f"- {item}" for item in items])
+
+# Shared by every service so fragments rendered for one report are reused by the next
+renderer = ReportRenderer()
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional
+from services.metrics import record_cache
+
+class ResponseCache:
+    """LRU cache of LLM responses keyed by a digest of the full prompt, with wall-clock expiry"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('LLM_CACHE_SIZE', '10000'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('LLM_CACHE_SECONDS', '0'))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending: Optional[Callable[[], Optional[list]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    @staticmethod
+    def key(prompt: Any) -> str:
+        """Digest of the prompt text; the prompt states days left, so keys change as deadlines approach"""
+        if isinstance(prompt, (list, tuple)):
+            text = "\x00".join(f"{getattr(m, 'type', '')}:{getattr(m, 'content', m)}" for m in prompt)
+        else:
+            text = str(prompt)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        self._restore_pending()
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.time():
+            self._entries.move_to_end(key)
+            record_cache("llm", hit=True)
+            return entry[0]
+        if entry is not None:
+            del self._entries[key]
+        record_cache("llm", hit=False)
+        return None
+
+    def set(self, key: str, value: str):
+        if not self.enabled or not value:
+            return
+        self._restore_pending()
+        self._entries[key] = (value, time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def export(self) -> List[list]:
+        """Unexpired entries as [key, response, expires_at], oldest first"""
+        self._restore_pending()
+        now = time.time()
+        return [[key, value, expires] for key, (value, expires) in self._entries.items() if expires > now]
+
+    def attach_snapshot(self, loader: Callable[[], Optional[list]]):
+        """Restore exported entries on first use instead of at startup"""
+        self._pending = loader
+
+    def _restore_pending(self):
+        if self._pending is None:
+            return
+        loader, self._pending = self._pending, None
+        now = time.time()
+        # Restored entries are older than anything cached since startup
+        for key, value, expires in reversed(loader() or []):
+            if expires > now and key not in self._entries:
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key, last=False)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
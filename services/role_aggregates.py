@@ -0,0 +1,119 @@
+import heapq
+import itertools
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from models.schemas import TeamMember
+from services.time_context import current_time
+
+# A member is a blocker below this progress with a deadline within BLOCKER_DAYS (overdue included)
+BLOCKER_PROGRESS = 30
+BLOCKER_DAYS = 2
+
+def row_keys(team_members: Iterable[TeamMember]) -> Iterator[Tuple[str, TeamMember]]:
+    """(key, member) per sheet row: the lowercased email, suffixed #2, #3, ... for repeated emails"""
+    seen: Dict[str, int] = defaultdict(int)
+    for member in team_members:
+        email = member.email.lower()
+        seen[email] += 1
+        yield (email if seen[email] == 1 else f"{email}#{seen[email]}"), member
+
+class RoleAggregates:
+    """Running per-role progress sums and counts plus blockers, updated row by row as the roster changes"""
+
+    def __init__(self, team_members: Iterable[TeamMember] = ()):
+        self._sums: Dict[str, float] = defaultdict(float)
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._members: Dict[str, TeamMember] = {}
+        self._blockers: Dict[str, TeamMember] = {}
+        self._positions: Dict[str, int] = {}  # Roster order, for stable blocker listings
+        # (time the member enters the blocker window, seq, row key, member) for low-progress members not yet in it
+        self._pending: List[Tuple[float, int, str, TeamMember]] = []
+        self._seq = itertools.count()
+        self._checked_at: Optional[datetime] = None
+        self.sync(team_members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def upsert(self, member: TeamMember, key: Optional[str] = None):
+        """Add or replace a row; the key defaults to the email's first row (see row_keys)"""
+        key = key or member.email.lower()
+        old = self._members.get(key)
+        if old is not None:
+            if old == member:
+                return
+            self._subtract(key, old)
+        self._members[key] = member
+        self._positions.setdefault(key, len(self._positions))
+        self._sums[member.role] += member.progress or 0.0
+        self._counts[member.role] += 1
+        if (member.progress or 0.0) < BLOCKER_PROGRESS and member.deadlines:
+            # timedelta.days floors, so the window opens BLOCKER_DAYS + 1 days before the earliest deadline
+            enters_at = min(member.deadlines) - timedelta(days=BLOCKER_DAYS + 1)
+            if self._checked_at is not None and enters_at < self._checked_at:
+                self._blockers[key] = member
+            else:
+                heapq.heappush(self._pending, (enters_at.timestamp(), next(self._seq), key, member))
+                if len(self._pending) > 2 * len(self._members) + 64:
+                    self._compact()
+
+    def remove(self, key: str):
+        key = key.lower()
+        old = self._members.pop(key, None)
+        if old is not None:
+            self._subtract(key, old)
+            del self._positions[key]
+
+    def sync(self, team_members: Iterable[TeamMember]):
+        """Apply a freshly fetched roster; only rows that differ touch the aggregates"""
+        seen = set()
+        for key, member in row_keys(team_members):
+            seen.add(key)
+            self.upsert(member, key)
+        for key in [key for key in self._members if key not in seen]:
+            self.remove(key)
+
+    def _subtract(self, key: str, member: TeamMember):
+        self._sums[member.role] -= member.progress or 0.0
+        self._counts[member.role] -= 1
+        if not self._counts[member.role]:
+            del self._counts[member.role]
+            del self._sums[member.role]
+        self._blockers.pop(key, None)
+        # Stale heap entries are skipped when popped, since they no longer match the stored member
+
+    def _compact(self):
+        self._pending = [entry for entry in self._pending if self._members.get(entry[2]) is entry[3]]
+        heapq.heapify(self._pending)
+
+    @property
+    def overall_progress(self) -> float:
+        return sum(self._sums.values()) / len(self._members) if self._members else 0.0
+
+    def role_progress(self) -> Dict[str, float]:
+        """Average progress per role, O(roles)"""
+        return {role: self._sums[role] / count for role, count in self._counts.items()}
+
+    def blockers(self, now: Optional[datetime] = None) -> List[TeamMember]:
+        """Members behind on tasks with approaching deadlines, as of now"""
+        now = now or current_time().now
+        if self._checked_at is not None and now < self._checked_at:
+            # Time went backwards (a pinned report date): rebuild the window from scratch
+            self._checked_at = None
+            self._blockers.clear()
+            rows, self._members, self._pending = list(self._members.items()), {}, []
+            self._sums.clear()
+            self._counts.clear()
+            for key, member in rows:
+                self.upsert(member, key)
+        self._checked_at = now
+        cutoff = now.timestamp()
+        while self._pending and self._pending[0][0] < cutoff:
+            _, _, key, member = heapq.heappop(self._pending)
+            if self._members.get(key) is member:
+                self._blockers[key] = member
+        return [member for _, member in sorted(self._blockers.items(), key=lambda item: self._positions[item[0]])]
+
+    def blocker_count(self, now: Optional[datetime] = None) -> int:
+        return len(self.blockers(now))
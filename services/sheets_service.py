@@ -2,50 +2,156 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+import asyncio
+import hashlib
+import json
 import os
 import pickle
-from typing import List
+import threading
+from typing import Dict, List, Optional
 from models.schemas import TeamMember
+from services.metrics import timed, current_trace_id, is_rate_limit_error, RATE_LIMITED
 from datetime import datetime
 
 class GoogleSheetsService:
     SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+    # Writing progress back needs the full scope (delete token.pickle to re-consent after enabling)
+    WRITE_SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+    PROGRESS_COLUMN = 'F'
     
-    def __init__(self):
+    # Credentials and API clients are shared by every instance (one per tenant)
+    _shared_creds = None
+    _creds_lock = threading.Lock()
+    _local = threading.local()
+    
+    def __init__(self, spreadsheet_id: Optional[str] = None):
         self.creds = None
-        self.spreadsheet_id = os.getenv('GOOGLE_SHEETS_ID')
+        self.spreadsheet_id = spreadsheet_id or os.getenv('GOOGLE_SHEETS_ID')
         self.range_name = 'Team!A2:F'  # Adjust based on your sheet structure
+        self.first_row = 2  # Sheet row of the first value in range_name
+        self.roster_version = None  # Content hash of the rows last fetched
         
     def _get_credentials(self):
         """Get or refresh Google API credentials"""
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                self.creds = pickle.load(token)
-        
-        if not self.creds or not self.creds.valid:
-            if self.creds and self.creds.expired and self.creds.refresh_token:
-                self.creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    os.getenv('GOOGLE_SHEETS_CREDENTIALS_PATH'),
-                    self.SCOPES
-                )
-                self.creds = flow.run_local_server(port=0)
+        cls = GoogleSheetsService
+        with cls._creds_lock:
+            if cls._shared_creds is None and os.path.exists('token.pickle'):
+                with open('token.pickle', 'rb') as token:
+                    cls._shared_creds = pickle.load(token)
             
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(self.creds, token)
+            creds = cls._shared_creds
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    creds.refresh(Request())
+                else:
+                    flow = InstalledAppFlow.from_client_secrets_file(
+                        os.getenv('GOOGLE_SHEETS_CREDENTIALS_PATH'),
+                        self._scopes()
+                    )
+                    creds = flow.run_local_server(port=0)
+                
+                with open('token.pickle', 'wb') as token:
+                    pickle.dump(creds, token)
+                cls._shared_creds = creds
+            self.creds = creds
+
+    @property
+    def write_enabled(self) -> bool:
+        return os.getenv('SHEETS_WRITE_ENABLED', 'false').lower() == 'true'
+
+    def _scopes(self) -> List[str]:
+        return self.WRITE_SCOPES if self.write_enabled else self.SCOPES
+
+    def _get_api(self):
+        """Get this thread's Sheets API client, building it once per thread and credential set"""
+        self._get_credentials()
+        local = GoogleSheetsService._local
+        # httplib2 connections are not thread-safe, so clients are pooled per worker thread
+        if getattr(local, 'creds', None) is not self.creds:
+            local.api = build('sheets', 'v4', credentials=self.creds, cache_discovery=False)
+            local.creds = self.creds
+        return local.api
 
     async def _get_sheet_values(self):
         """Fetch values from the Google Sheet asynchronously."""
-        self._get_credentials()
-        service = build('sheets', 'v4', credentials=self.creds)
-        sheet = service.spreadsheets()
-        result = sheet.values().get(spreadsheetId=self.spreadsheet_id, range=self.range_name).execute()
+        return await asyncio.to_thread(self._fetch_sheet_values)
+
+    def _fetch_sheet_values(self):
+        """Fetch values from the Google Sheet (blocking, run off the event loop)."""
+        with timed("sheets_fetch"):
+            sheet = self._get_api().spreadsheets()
+            request = sheet.values().get(spreadsheetId=self.spreadsheet_id, range=self.range_name)
+            if current_trace_id():
+                request.headers['X-Trace-Id'] = current_trace_id()
+            try:
+                result = request.execute()
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    RATE_LIMITED.inc(service="sheets")
+                raise
         values = result.get('values', [])
         return values
 
     async def get_team_data(self) -> List[TeamMember]:
         values = await self._get_sheet_values()
+        self.roster_version = self._roster_version(values)
+        with timed("row_parse"):
+            return self._parse_rows(values)
+
+    async def update_progress(self, progress_by_email: Dict[str, float]) -> Dict[str, float]:
+        """Write progress for several members in one batchUpdate call; returns the updates actually written"""
+        if not progress_by_email:
+            return {}
+        return await asyncio.to_thread(self._write_progress, progress_by_email)
+
+    def _write_progress(self, progress_by_email: Dict[str, float]) -> Dict[str, float]:
+        """Write progress cells (blocking, run off the event loop)."""
+        # Rows are located from a fresh read: the cached roster may predate inserted, deleted or re-sorted rows
+        row_numbers = self._email_rows(self._fetch_sheet_values())
+        data = []
+        written = {}
+        for email, progress in progress_by_email.items():
+            row = row_numbers.get(email.lower())
+            if row is None:
+                print(f"No single sheet row for {email}, skipping progress update")
+                continue
+            data.append({
+                "range": f"{self.range_name.split('!')[0]}!{self.PROGRESS_COLUMN}{row}",
+                "values": [[progress]]
+            })
+            written[email] = progress
+        if not data:
+            return written
+        with timed("sheets_write"):
+            request = self._get_api().spreadsheets().values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={"valueInputOption": "RAW", "data": data}
+            )
+            if current_trace_id():
+                request.headers['X-Trace-Id'] = current_trace_id()
+            try:
+                request.execute()
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    RATE_LIMITED.inc(service="sheets")
+                raise
+        return written
+
+    def _roster_version(self, values) -> str:
+        """Hash the raw rows so identical rosters share a version"""
+        return hashlib.sha1(json.dumps(values, separators=(',', ':')).encode()).hexdigest()[:16]
+
+    def _email_rows(self, values) -> Dict[str, Optional[int]]:
+        """Sheet row of each email in column B; None for an email on several rows, which is never written"""
+        rows: Dict[str, Optional[int]] = {}
+        for offset, row in enumerate(values):
+            if isinstance(row, (list, tuple)) and len(row) > 1 and row[1].strip():
+                email = row[1].strip().lower()
+                rows[email] = None if email in rows else self.first_row + offset
+        return rows
+
+    def _parse_rows(self, values) -> List[TeamMember]:
+        """Convert raw sheet rows into team members, skipping malformed rows"""
         team_members = []
         for row in values:
             try:
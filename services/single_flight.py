@@ -0,0 +1,24 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from services.metrics import COALESCED_REQUESTS
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight computation"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], operation: str = "unknown") -> Any:
+        """Run fn, or wait for the identical call already running, and return its result to every caller"""
+        task = self._calls.get(key)
+        if task is not None:
+            COALESCED_REQUESTS.inc(operation=operation)
+        else:
+            # A separate task, so one caller giving up does not cancel the work for the others
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
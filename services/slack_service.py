@@ -1,18 +1,57 @@
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+import asyncio
 import os
-from typing import List, Optional
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 from models.schemas import SlackMessage, ProgressReport
+from services.metrics import timed, is_rate_limit_error, RATE_LIMITED
+from services.report_renderer import renderer
 
 class SlackService:
-    def __init__(self):
-        self.client = WebClient(token=os.getenv('SLACK_BOT_TOKEN'))
-        self.default_channel = os.getenv('SLACK_DEFAULT_CHANNEL')
+    # One Web API client per token, shared by every instance (one per tenant)
+    _clients: Dict[str, WebClient] = {}
+    # Slack user id -> (email, expiry), per token and shared like the clients
+    _user_email_caches: Dict[str, Dict[str, Tuple[Optional[str], float]]] = {}
+    
+    def __init__(self, default_channel: Optional[str] = None):
+        token = os.getenv('SLACK_BOT_TOKEN')
+        if token not in self._clients:
+            self._clients[token] = WebClient(token=token)
+        self.client = self._clients[token]
+        self.default_channel = default_channel or os.getenv('SLACK_DEFAULT_CHANNEL')
+        # (channel, ts) of recent reminder posts, whose thread replies carry progress updates
+        self.reminder_threads: Deque[Tuple[str, str]] = deque(maxlen=int(os.getenv('SLACK_REMINDER_THREADS', '200')))
+        self._user_emails = self._user_email_caches.setdefault(token, {})
+        self.user_email_ttl = float(os.getenv('SLACK_USER_CACHE_SECONDS', '3600'))
+        # Slack truncates long messages, so digest details are split into thread replies of at most this size
+        self.digest_reply_chars = int(os.getenv('SLACK_DIGEST_REPLY_CHARS', '3000'))
+    
+    def post_message(self, **kwargs):
+        """Post a message, recording latency and rate limiting"""
+        try:
+            with timed("slack_post"):
+                if isinstance(kwargs.get("blocks"), str):
+                    # Pre-serialized Block Kit: chat_postMessage would JSON-encode the string again,
+                    # while a form-encoded post hands Slack the array as written
+                    return self.client.api_call(
+                        "chat.postMessage", data={key: value for key, value in kwargs.items() if value is not None}
+                    )
+                return self.client.chat_postMessage(**kwargs)
+        except SlackApiError as e:
+            if is_rate_limit_error(e):
+                RATE_LIMITED.inc(service="slack")
+            raise
+    
+    async def apost_message(self, **kwargs):
+        """Post a message without blocking the event loop"""
+        return await asyncio.to_thread(self.post_message, **kwargs)
     
     async def send_notification(self, message: str, channel: Optional[str] = None):
         """Send a simple notification to a Slack channel"""
         try:
-            response = self.client.chat_postMessage(
+            response = await self.apost_message(
                 channel=channel or self.default_channel,
                 text=message
             )
@@ -26,7 +65,7 @@ class SlackService:
         blocks = self._create_report_blocks(report)
         
         try:
-            response = self.client.chat_postMessage(
+            response = await self.apost_message(
                 channel=self.default_channel,
                 text=f"Daily Progress Report - {report.date.strftime('%Y-%m-%d')}",
                 blocks=blocks
@@ -36,80 +75,9 @@ class SlackService:
             print(f"Error sending progress report to Slack: {str(e)}")
             raise
     
-    def _create_report_blocks(self, report: ProgressReport) -> List[dict]:
-        """Create formatted blocks for the progress report"""
-        blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": f"📊 Daily Progress Report - {report.date.strftime('%Y-%m-%d')}"
-                }
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*Overall Progress:* {report.overall_progress}%"
-                }
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*Summary:*\n{report.summary}"
-                }
-            }
-        ]
-        
-        # Add team member updates
-        for member in report.team_members:
-            blocks.extend([
-                {
-                    "type": "divider"
-                },
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*{member.name}* ({member.role})\n"
-                               f"Progress: {member.progress}%\n"
-                               f"Tasks: {', '.join(member.tasks)}"
-                    }
-                }
-            ])
-        
-        # Add blockers
-        if report.blockers:
-            blocks.extend([
-                {
-                    "type": "divider"
-                },
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": "*🚧 Blockers:*\n" + "\n".join([f"• {blocker}" for blocker in report.blockers])
-                    }
-                }
-            ])
-        
-        # Add recommendations
-        if report.recommendations:
-            blocks.extend([
-                {
-                    "type": "divider"
-                },
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": "*💡 Recommendations:*\n" + "\n".join([f"• {rec}" for rec in report.recommendations])
-                    }
-                }
-            ])
-        
-        return blocks
+    def _create_report_blocks(self, report: ProgressReport) -> str:
+        """Create formatted blocks for the progress report, serialized for chat.postMessage"""
+        return renderer.report_blocks(report)
     
     async def send_reminder(self, team_member_name: str, tasks: List[str]):
         """Send a reminder to a team member about their tasks"""
@@ -119,11 +87,102 @@ class SlackService:
         message += "\n\nPlease update your progress when you get a chance!"
         
         try:
-            response = self.client.chat_postMessage(
+            response = await self.apost_message(
                 channel=self.default_channel,
                 text=message
             )
+            self._track_thread(response)
             return response
         except SlackApiError as e:
             print(f"Error sending reminder to Slack: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+    
+    async def send_reminder_digest(self, reminders: List[Tuple[str, List[str]]], title: str = "Task reminders"):
+        """Send all reminders as one channel message with the details in thread replies"""
+        if not reminders:
+            return None
+        
+        sections = [
+            f"*{name}*\n" + "\n".join([f"• {task}" for task in tasks])
+            for name, tasks in reminders
+        ]
+        sections.append("Please update your progress when you get a chance!")
+        replies = _split_text(sections, self.digest_reply_chars)
+        
+        try:
+            parent = await self.apost_message(
+                channel=self.default_channel,
+                text=f"⏰ {title}: {len(reminders)} team members have tasks needing attention. Details in thread 👇"
+            )
+            # In order, so the thread reads top to bottom
+            for reply in replies:
+                await self.apost_message(
+                    channel=parent.get("channel") or self.default_channel,
+                    thread_ts=parent.get("ts"),
+                    text=reply
+                )
+            self._track_thread(parent)
+            return parent
+        except SlackApiError as e:
+            print(f"Error sending reminder digest to Slack: {str(e)}")
+            raise
+    
+    def _track_thread(self, response):
+        if response.get("channel") and response.get("ts"):
+            self.reminder_threads.append((response["channel"], response["ts"]))
+    
+    def get_thread_replies(self, channel: str, thread_ts: str, oldest: Optional[str] = None) -> List[dict]:
+        """Human replies in a thread, newer than oldest (blocking)"""
+        with timed("slack_replies"):
+            response = self.client.conversations_replies(channel=channel, ts=thread_ts, oldest=oldest or thread_ts)
+        return [
+            message for message in response.get("messages", [])
+            if message.get("ts") != thread_ts and not message.get("bot_id") and message.get("user")
+        ]
+    
+    def user_email(self, user_id: str) -> Optional[str]:
+        """Email address of a Slack user, cached for SLACK_USER_CACHE_SECONDS (needs the users:read.email scope; blocking)"""
+        cached = self._user_emails.get(user_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        try:
+            response = self.client.users_info(user=user_id)
+        except SlackApiError as e:
+            print(f"Error looking up Slack user {user_id}: {str(e)}")
+            return None
+        email = response["user"]["profile"].get("email")
+        self._user_emails[user_id] = (email, time.monotonic() + self.user_email_ttl)
+        return email
+
+def _split_text(sections: List[str], limit: int, separator: str = "\n\n") -> List[str]:
+    """Join sections into messages of at most limit characters; a longer section is split at line breaks"""
+    messages: List[str] = []
+    current = ""
+    for section in sections:
+        pieces = [section] if limit <= 0 or len(section) <= limit else _split_lines(section, limit)
+        for piece in pieces:
+            if current and len(current) + len(separator) + len(piece) > limit > 0:
+                messages.append(current)
+                current = ""
+            current = f"{current}{separator}{piece}" if current else piece
+    if current:
+        messages.append(current)
+    return messages
+
+def _split_lines(text: str, limit: int) -> List[str]:
+    chunks: List[str] = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + 1 + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
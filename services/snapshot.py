@@ -0,0 +1,125 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Callable, Dict, Optional
+from models.schemas import TeamMember
+from services.report_renderer import ReportRenderer, FRAGMENT_VERSION
+from services.response_cache import ResponseCache
+
+try:
+    import msgpack
+except ImportError:  # JSON is used instead
+    msgpack = None
+
+# File layout: MAGIC, u32 header length, JSON header, then the encoded sections back to back.
+# The header lists each section's offset, length and version, so a section is decoded only when used.
+MAGIC = b"SLTSNAP1"
+FORMAT_VERSION = 1
+LLM_CACHE_VERSION = 1
+_HEADER_LENGTH = struct.Struct("<I")
+
+def roster_schema_version() -> str:
+    """Fingerprint of the roster model; rosters saved under another schema are discarded"""
+    schema = json.dumps(TeamMember.model_json_schema(), sort_keys=True)
+    return hashlib.sha1(schema.encode()).hexdigest()[:12]
+
+def _encode(value: Any, codec: str) -> bytes:
+    if codec == "msgpack":
+        return msgpack.packb(value, use_bin_type=True)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+def _decode(data, codec: str) -> Any:
+    if codec == "msgpack":
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(bytes(data))
+
+def write_snapshot(path: str, sections: Dict[str, Any], versions: Dict[str, Any], codec: Optional[str] = None):
+    """Write sections atomically: readers see the old snapshot or the new one, never a partial file"""
+    codec = codec or ("msgpack" if msgpack is not None else "json")
+    payloads = {name: _encode(value, codec) for name, value in sections.items() if value is not None}
+    offset = 0
+    index = {}
+    for name, payload in payloads.items():
+        index[name] = {"offset": offset, "length": len(payload), "version": versions.get(name)}
+        offset += len(payload)
+    header = json.dumps({
+        "format": FORMAT_VERSION,
+        "codec": codec,
+        "created_at": time.time(),
+        "sections": index,
+    }).encode()
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for payload in payloads.values():
+            f.write(payload)
+    os.replace(tmp_path, path)
+
+class Snapshot:
+    """A memory-mapped snapshot; sections are decoded on first access"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a snapshot file")
+        start = len(MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack(self._map[len(MAGIC):start])
+        self.header = json.loads(self._map[start:start + header_length])
+        self._data_start = start + header_length
+        if self.header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot format {self.header.get('format')}")
+        if self.header.get("codec") == "msgpack" and msgpack is None:
+            raise ValueError("snapshot is MessagePack but msgpack is not installed")
+
+    def section(self, name: str, version: Any) -> Optional[Any]:
+        """Decode one section, or None if it is missing or was written by another version"""
+        entry = self.header["sections"].get(name)
+        if not entry or entry.get("version") != version:
+            return None
+        start = self._data_start + entry["offset"]
+        try:
+            with memoryview(self._map) as whole, whole[start:start + entry["length"]] as view:
+                return _decode(view, self.header["codec"])
+        except Exception as e:
+            print(f"Ignoring snapshot section {name}: {str(e)}")
+            return None
+
+    def loader(self, name: str, version: Any) -> Callable[[], Optional[Any]]:
+        return lambda: self.section(name, version)
+
+def open_snapshot(path: str) -> Optional[Snapshot]:
+    """Map a snapshot, or return None if it is missing or unusable"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return Snapshot(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Ignoring snapshot {path}: {str(e)}")
+        return None
+
+def save_state(path: str, tenants, renderer: ReportRenderer, response_cache: ResponseCache):
+    """Snapshot every tenant's roster, the rendered fragments and the LLM response cache"""
+    schema = roster_schema_version()
+    sections = {f"roster:{tenant.id}": tenant.export_roster() for tenant in tenants.all()}
+    versions = {name: schema for name in sections}
+    sections["fragments"] = renderer.export()
+    versions["fragments"] = FRAGMENT_VERSION
+    sections["llm_cache"] = response_cache.export()
+    versions["llm_cache"] = LLM_CACHE_VERSION
+    write_snapshot(path, sections, versions)
+
+def restore_state(snapshot: Snapshot, tenants, renderer: ReportRenderer, response_cache: ResponseCache):
+    """Point each cache at its snapshot section; nothing is decoded until the cache is first used"""
+    schema = roster_schema_version()
+    for tenant in tenants.all():
+        tenant.attach_snapshot(snapshot.loader(f"roster:{tenant.id}", schema))
+    renderer.attach_snapshot(snapshot.loader("fragments", FRAGMENT_VERSION))
+    response_cache.attach_snapshot(snapshot.loader("llm_cache", LLM_CACHE_VERSION))
@@ -0,0 +1,68 @@
+import os
+from typing import Optional
+from services.event_dispatcher import EventDispatcher, EventQueueFull
+from services.metrics import trace_id_var
+
+class SocketModeTransport:
+    """Receives Slack events over a Socket Mode WebSocket and feeds them to the same dispatcher as /slack/events"""
+
+    def __init__(self, dispatcher: EventDispatcher, app_token: Optional[str] = None, url: Optional[str] = None,
+                 enabled: Optional[bool] = None):
+        self.dispatcher = dispatcher
+        self.app_token = app_token or os.getenv('SLACK_APP_TOKEN')
+        # Fixed WebSocket URL instead of apps.connections.open, e.g. a local stand-in for load tests
+        self.url = url or os.getenv('SLACK_SOCKET_MODE_URL')
+        self.enabled = enabled if enabled is not None else os.getenv('SLACK_SOCKET_MODE', 'false').lower() == 'true'
+        self.ping_interval = float(os.getenv('SLACK_SOCKET_MODE_PING_SECONDS', '5'))
+        self.client = None
+
+    async def start(self):
+        """Open the connection; the client reconnects by itself when it drops or Slack asks it to"""
+        if not self.enabled or self.client is not None:
+            return
+        try:
+            from slack_sdk.socket_mode.aiohttp import SocketModeClient
+            from slack_sdk.web.async_client import AsyncWebClient
+        except ImportError:
+            raise ImportError("The aiohttp package is required for SLACK_SOCKET_MODE=true")
+        if not self.app_token and not self.url:
+            raise ValueError("SLACK_APP_TOKEN is required for SLACK_SOCKET_MODE=true")
+
+        self.client = SocketModeClient(
+            app_token=self.app_token or "",
+            web_client=AsyncWebClient(token=os.getenv('SLACK_BOT_TOKEN')),
+            auto_reconnect_enabled=True,
+            ping_interval=self.ping_interval,
+        )
+        if self.url:
+            # Reconnects fetch a fresh URL through this too, so they stay on the override
+            async def fixed_url() -> str:
+                return self.url
+            self.client.issue_new_wss_url = fixed_url
+        self.client.socket_mode_request_listeners.append(self._handle)
+        await self.client.connect()
+        print("Slack Socket Mode connected")
+
+    async def stop(self):
+        if self.client is None:
+            return
+        client, self.client = self.client, None
+        await client.close()
+
+    async def _handle(self, client, request):
+        """Runs in its own task per envelope, so slow dispatches never hold up the socket"""
+        from slack_sdk.socket_mode.response import SocketModeResponse
+
+        if request.type == "events_api":
+            body = request.payload or {}
+            event = body.get("event", {})
+            if body.get("event_id"):
+                trace_id_var.set(body["event_id"])
+            if event.get("type") == "app_mention":
+                try:
+                    await self.dispatcher.dispatch(event, body.get("event_id"))
+                except EventQueueFull as e:
+                    # No ack: Slack redelivers the envelope once it times out
+                    print(f"Error handling Slack event: {str(e)}")
+                    return
+        await client.send_socket_mode_response(SocketModeResponse(envelope_id=request.envelope_id))
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+class StateBackend(ABC):
+    """Shared key/value state and leases visible to every worker and replica"""
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Acquire or renew a lease; returns True if the owner holds it afterwards"""
+
+    @abstractmethod
+    def release_lease(self, name: str, owner: str):
+        """Release a lease if it is held by the owner"""
+
+class SQLiteStateBackend(StateBackend):
+    """State backend on a local SQLite file, relying on SQLite's file locking across processes"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('STATE_DB_PATH', 'state.db')
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)""")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM kv WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return default
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), expires_at)
+        )
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        conn = self._connect()
+        now = time.time()
+        # BEGIN IMMEDIATE takes the database write lock, so check-and-set is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT owner, expires_at FROM leases WHERE name = ?", (name,)
+            ).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                (name, owner, now + ttl)
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release_lease(self, name: str, owner: str):
+        self._connect().execute(
+            "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+        )
+
+class RedisStateBackend(StateBackend):
+    """State backend on any Redis-compatible server, for deployments spanning several hosts"""
+
+    # Renew only if the caller still owns the lease
+    _RENEW_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    _RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = 'slack_team:'):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis package is required for STATE_BACKEND=redis")
+        self.client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        self.prefix = prefix
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.client.get(self.prefix + key)
+        return default if value is None else json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.client.set(
+            self.prefix + key,
+            json.dumps(value, default=str),
+            px=int(ttl * 1000) if ttl else None
+        )
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        key = f"{self.prefix}lease:{name}"
+        ttl_ms = int(ttl * 1000)
+        if self.client.set(key, owner, nx=True, px=ttl_ms):
+            return True
+        return bool(self.client.eval(self._RENEW_SCRIPT, 1, key, owner, ttl_ms))
+
+    def release_lease(self, name: str, owner: str):
+        self.client.eval(self._RELEASE_SCRIPT, 1, f"{self.prefix}lease:{name}", owner)
+
+def create_state_backend() -> StateBackend:
+    """Create the state backend selected by STATE_BACKEND (sqlite or redis)"""
+    backend = os.getenv('STATE_BACKEND', 'sqlite').lower()
+    if backend == 'redis':
+        return RedisStateBackend()
+    if backend == 'sqlite':
+        return SQLiteStateBackend()
+    raise ValueError(f"Unknown STATE_BACKEND: {backend}")
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+from models.schemas import ConfiguredTenant, Tenant, TeamMember
+from models.roster import roster_dump, trusted_members
+from services.sheets_service import GoogleSheetsService
+from services.slack_service import SlackService
+from services.metrics import record_cache
+from services.concurrency import FairLimiter, AdaptiveLimiter
+from services.single_flight import SingleFlight
+from services.deadline_index import DeadlineIndex
+from services.role_aggregates import RoleAggregates, row_keys
+
+class TenantContext:
+    """Services, roster cache and LLM budget for one team"""
+
+    def __init__(self, tenant: Tenant, llm_limiter: FairLimiter):
+        self.tenant = tenant
+        self.sheets_service = GoogleSheetsService(spreadsheet_id=tenant.spreadsheet_id)
+        self.slack_service = SlackService(default_channel=tenant.channel)
+        self.llm_limiter = llm_limiter
+        self.llm_limiter.set_budget(tenant.id, tenant.llm_concurrency)
+        self.roster_ttl = float(os.getenv('ROSTER_CACHE_SECONDS', '60'))
+        self._roster: Optional[List[TeamMember]] = None
+        self._roster_loaded_at = 0.0
+        self.roster_version: Optional[str] = None
+        self.deadline_index: Optional[DeadlineIndex] = None
+        self.aggregates = RoleAggregates()
+        self._roster_flight = SingleFlight()
+        self._roster_saved_at = 0.0  # Wall-clock time of the last load, for snapshots
+        self._pending: Optional[Callable[[], Optional[dict]]] = None
+
+    @property
+    def id(self) -> str:
+        return self.tenant.id
+
+    async def get_team_data(self, refresh: bool = False) -> List[TeamMember]:
+        """Get the tenant's roster, served from cache while it is fresh"""
+        if self._pending is not None:
+            self._restore_pending()
+        if (
+            not refresh
+            and self._roster is not None
+            and time.monotonic() - self._roster_loaded_at < self.roster_ttl
+        ):
+            record_cache("roster", hit=True)
+            return self._roster
+        record_cache("roster", hit=False)
+        return await self._roster_flight.do("roster", self._load_roster, operation="roster_fetch")
+
+    async def _load_roster(self) -> List[TeamMember]:
+        self._roster = await self.sheets_service.get_team_data()
+        if self.sheets_service.roster_version != self.roster_version or self.deadline_index is None:
+            self.aggregates.sync(self._roster)
+            # Rebuilt only when the sheet changed, so due-soon queries are bisects on a kept index
+            self.deadline_index = DeadlineIndex(self._roster)
+        self.roster_version = self.sheets_service.roster_version
+        self._roster_loaded_at = time.monotonic()
+        self._roster_saved_at = time.time()
+        return self._roster
+
+    def update_roster(self, team_members: List[TeamMember], changed: Dict[str, float]):
+        """Replace the cached roster with locally updated members until the next sheet fetch"""
+        if self._roster is None:
+            return
+        self._roster = team_members
+        # A new version, so results cached for the old roster are not reused
+        digest = f"{self.roster_version}:{sorted(changed.items())}"
+        self.roster_version = hashlib.sha1(digest.encode()).hexdigest()[:16]
+        self.deadline_index = DeadlineIndex(team_members)
+        for key, member in row_keys(team_members):
+            if member.email in changed:
+                self.aggregates.upsert(member, key)
+
+    def invalidate_roster(self):
+        """Drop the cached roster so the next read goes to the sheet"""
+        self._roster = None
+        self._pending = None
+
+    def export_roster(self) -> Optional[dict]:
+        """The cached roster in a serializable form, for snapshots"""
+        if self._roster is None:
+            return None
+        return {
+            "spreadsheet_id": self.sheets_service.spreadsheet_id,
+            "roster_version": self.roster_version,
+            "saved_at": self._roster_saved_at,
+            "members": roster_dump(self._roster),
+        }
+
+    def attach_snapshot(self, loader: Callable[[], Optional[dict]]):
+        """Seed the roster cache from a snapshot on first read instead of at startup"""
+        self._pending = loader
+
+    def _restore_pending(self):
+        loader, self._pending = self._pending, None
+        data = loader()
+        if not data or self._roster is not None:
+            return
+        age = time.time() - data["saved_at"]
+        # A roster older than the cache TTL, or from another sheet, would be served stale
+        if data["spreadsheet_id"] != self.sheets_service.spreadsheet_id or not 0 <= age < self.roster_ttl:
+            return
+        # The section is keyed by the roster schema version, so rows are trusted as written
+        self._roster = trusted_members(data["members"])
+        self.roster_version = data["roster_version"]
+        self.deadline_index = DeadlineIndex(self._roster)
+        self.aggregates.sync(self._roster)
+        self._roster_saved_at = data["saved_at"]
+        self._roster_loaded_at = time.monotonic() - age
+
+    def llm_slot(self):
+        """Hold one of this tenant's LLM slots for the duration of the block"""
+        return self.llm_limiter.slot(self.tenant.id)
+
+class TenantRegistry:
+    """Tenants served by this process, loaded from TENANTS_CONFIG or the single-team env vars"""
+
+    def __init__(self, config_path: Optional[str] = None):
+        config_path = config_path or os.getenv('TENANTS_CONFIG')
+        # With several teams configured, an unmapped channel belongs to none of them
+        self.multi_tenant = bool(config_path)
+        if config_path:
+            with open(config_path) as f:
+                # Rejected at load time if an entry lacks its own sheet, channel or manager
+                tenants = [ConfiguredTenant(**entry) for entry in json.load(f)]
+        else:
+            tenants = [Tenant(
+                id='default',
+                spreadsheet_id=os.getenv('GOOGLE_SHEETS_ID'),
+                channel=os.getenv('SLACK_DEFAULT_CHANNEL'),
+                manager_email=os.getenv('MANAGER_EMAIL') or None
+            )]
+        if not tenants:
+            raise ValueError("At least one tenant must be configured")
+
+        # Global LLM concurrency adapts to Gemini's quota; tenants share it round-robin
+        self.llm_limiter = AdaptiveLimiter()
+        self.default_id = tenants[0].id
+        self._contexts: Dict[str, TenantContext] = {
+            tenant.id: TenantContext(tenant, self.llm_limiter)
+            for tenant in tenants
+        }
+        self._by_channel: Dict[str, TenantContext] = {
+            context.tenant.channel: context
+            for context in self._contexts.values()
+            if context.tenant.channel
+        }
+
+    def get(self, tenant_id: Optional[str] = None) -> TenantContext:
+        """Get a tenant by id, or the default tenant"""
+        context = self._contexts.get(tenant_id or self.default_id)
+        if not context:
+            raise KeyError(f"Unknown tenant: {tenant_id}")
+        return context
+
+    def for_channel(self, channel: Optional[str]) -> Optional[TenantContext]:
+        """Get the tenant that owns a Slack channel; only a single-team setup falls back to its one tenant"""
+        context = self._by_channel.get(channel)
+        if context is None and not self.multi_tenant:
+            return self.get()
+        return context
+
+    def all(self) -> List[TenantContext]:
+        return list(self._contexts.values())
@@ -0,0 +1,66 @@
+import functools
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+DATE_FORMAT = '%Y-%m-%d'
+
+class TimeContext:
+    """One pinned 'now' for a run, with date strings, day deltas and parsed dates cached per unique value"""
+
+    def __init__(self, now: Optional[datetime] = None):
+        self.now = now or datetime.now()
+        self._dates: Dict[datetime, str] = {}
+        self._days: Dict[datetime, int] = {}
+        self._parsed: Dict[str, Optional[datetime]] = {}
+
+    @property
+    def today(self) -> str:
+        return self.date(self.now)
+
+    def date(self, value: datetime) -> str:
+        text = self._dates.get(value)
+        if text is None:
+            text = self._dates[value] = value.strftime(DATE_FORMAT)
+        return text
+
+    def days_until(self, deadline: datetime) -> int:
+        """Whole days from now to the deadline, floored like timedelta.days (negative once overdue)"""
+        days = self._days.get(deadline)
+        if days is None:
+            days = self._days[deadline] = (deadline - self.now).days
+        return days
+
+    def parse(self, value: Any) -> Optional[datetime]:
+        """A deadline as a datetime, parsing YYYY-MM-DD strings once; None if it is not a date"""
+        if isinstance(value, datetime):
+            return value
+        text = str(value).strip()
+        if text not in self._parsed:
+            try:
+                self._parsed[text] = datetime.strptime(text, DATE_FORMAT)
+            except ValueError:
+                self._parsed[text] = None
+        return self._parsed[text]
+
+# The run's TimeContext; tasks and threads started from the run inherit it like the trace id
+time_context_var: ContextVar[Optional[TimeContext]] = ContextVar("time_context", default=None)
+
+def current_time(now: Optional[datetime] = None) -> TimeContext:
+    """The pinned context of the current run, or a fresh one outside a run or for an explicit now"""
+    if now is not None:
+        return TimeContext(now)
+    return time_context_var.get() or TimeContext()
+
+def pinned_time(func):
+    """Pin 'now' for the duration of an async call unless an enclosing run has already pinned it"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if time_context_var.get() is not None:
+            return await func(*args, **kwargs)
+        token = time_context_var.set(TimeContext())
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            time_context_var.reset(token)
+    return wrapper
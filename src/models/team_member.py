@@ -1,10 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from models.schemas import TeamMember
+from models.roster import SheetRowView
 
-class TeamMember(BaseModel):
-    email: str
-    name: str
-    role: str
-    work_target: str
-    deadline: str  # ISO format date string
-    progress: Optional[str] = None
\ No newline at end of file
+# The roster has one record type, models.schemas.TeamMember. The sheet's string shape
+# (work_target, comma-separated deadline dates) is a view over it rather than a second model.
+__all__ = ["TeamMember", "SheetRowView"]